@@ -0,0 +1,54 @@
+"""Indexes matching hot query predicates
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Primary keys are already indexed
+    op.drop_index('ix_nodes_id', table_name='nodes')
+    op.drop_index('ix_pipes_id', table_name='pipes')
+    op.drop_index('ix_leaks_id', table_name='leaks')
+    op.drop_index('ix_simulation_snapshots_id', table_name='simulation_snapshots')
+
+    # FK columns, for Node -> Pipe joins
+    op.create_index('ix_pipes_source_id', 'pipes', ['source_id'], unique=False)
+    op.create_index('ix_pipes_target_id', 'pipes', ['target_id'], unique=False)
+
+    # get_active_leaks: WHERE cleared_at IS NULL
+    op.create_index(
+        'ix_leaks_active', 'leaks', ['cleared_at'],
+        postgresql_where=sa.text('cleared_at IS NULL'),
+    )
+
+    # get_current_snapshot: WHERE is_current ORDER BY created_at DESC LIMIT 1
+    op.create_index(
+        'ix_snapshots_current_recent', 'simulation_snapshots', [sa.text('created_at DESC')],
+        postgresql_where=sa.text('is_current'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_snapshots_current_recent', table_name='simulation_snapshots')
+    op.drop_index('ix_leaks_active', table_name='leaks')
+    op.drop_index('ix_pipes_target_id', table_name='pipes')
+    op.drop_index('ix_pipes_source_id', table_name='pipes')
+
+    op.create_index('ix_simulation_snapshots_id', 'simulation_snapshots', ['id'], unique=False)
+    op.create_index('ix_leaks_id', 'leaks', ['id'], unique=False)
+    op.create_index('ix_pipes_id', 'pipes', ['id'], unique=False)
+    op.create_index('ix_nodes_id', 'nodes', ['id'], unique=False)
@@ -0,0 +1,65 @@
+"""JSONB snapshot payloads with summary columns
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-02-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JSON_COLUMNS = (
+    'node_pressures',
+    'pipe_flow_rates',
+    'node_actual_demand',
+    'pipe_velocities',
+    'pipe_pressure_drops',
+    'pipe_reynolds',
+    'active_leaks',
+    'warnings',
+)
+
+
+def upgrade() -> None:
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'simulation_snapshots', column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    # Summary columns. Generated columns can't aggregate over jsonb_each,
+    # so these are written by save_snapshot and backfilled here.
+    op.add_column('simulation_snapshots', sa.Column('min_pressure', sa.Float(), nullable=True))
+    op.add_column('simulation_snapshots', sa.Column('max_velocity', sa.Float(), nullable=True))
+    op.add_column('simulation_snapshots', sa.Column('n_active_leaks', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE simulation_snapshots SET
+            min_pressure = (SELECT min(value::float) FROM jsonb_each_text(node_pressures)),
+            max_velocity = (SELECT max(abs(value::float)) FROM jsonb_each_text(pipe_velocities)),
+            n_active_leaks = (SELECT count(*) FROM jsonb_object_keys(active_leaks))
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('simulation_snapshots', 'n_active_leaks')
+    op.drop_column('simulation_snapshots', 'max_velocity')
+    op.drop_column('simulation_snapshots', 'min_pressure')
+
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'simulation_snapshots', column,
+            type_=sa.JSON(),
+            postgresql_using=f'{column}::json',
+        )
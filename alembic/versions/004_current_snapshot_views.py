@@ -0,0 +1,53 @@
+"""Materialized views of the current snapshot, one row per node / pipe
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+        SELECT p.key::int AS node_id,
+               p.value::float AS pressure,
+               (s.node_actual_demand ->> p.key)::float AS actual_demand
+        FROM simulation_snapshots s, LATERAL jsonb_each_text(s.node_pressures) p
+        WHERE s.is_current
+    """)
+    # Unique indexes are required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_nodes_node_id "
+        "ON mv_current_snapshot_nodes (node_id)"
+    )
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+        SELECT f.key::int AS pipe_id,
+               f.value::float AS flow_rate,
+               (s.pipe_velocities ->> f.key)::float AS velocity,
+               (s.pipe_pressure_drops ->> f.key)::float AS pressure_drop,
+               (s.pipe_reynolds ->> f.key)::float AS reynolds
+        FROM simulation_snapshots s, LATERAL jsonb_each_text(s.pipe_flow_rates) f
+        WHERE s.is_current
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_pipes_pipe_id "
+        "ON mv_current_snapshot_pipes (pipe_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_current_snapshot_pipes")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_current_snapshot_nodes")
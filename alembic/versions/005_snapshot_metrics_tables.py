@@ -0,0 +1,175 @@
+"""Normalized per-node / per-pipe snapshot metrics
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-03-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+METRIC_JSON_COLUMNS = (
+    'node_pressures',
+    'node_actual_demand',
+    'pipe_flow_rates',
+    'pipe_velocities',
+    'pipe_pressure_drops',
+    'pipe_reynolds',
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'snapshot_node_metrics',
+        sa.Column('snapshot_id', sa.Integer(), nullable=False),
+        sa.Column('node_id', sa.Integer(), nullable=False),
+        sa.Column('pressure', sa.Float(), nullable=False),
+        sa.Column('actual_demand', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['snapshot_id'], ['simulation_snapshots.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('snapshot_id', 'node_id')
+    )
+    op.create_index(
+        'ix_snapshot_node_metrics_snapshot_id', 'snapshot_node_metrics', ['snapshot_id'],
+        postgresql_using='brin',
+    )
+
+    op.create_table(
+        'snapshot_pipe_metrics',
+        sa.Column('snapshot_id', sa.Integer(), nullable=False),
+        sa.Column('pipe_id', sa.Integer(), nullable=False),
+        sa.Column('flow_rate', sa.Float(), nullable=False),
+        sa.Column('velocity', sa.Float(), nullable=False),
+        sa.Column('pressure_drop', sa.Float(), nullable=False),
+        sa.Column('reynolds', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['snapshot_id'], ['simulation_snapshots.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('snapshot_id', 'pipe_id')
+    )
+    op.create_index(
+        'ix_snapshot_pipe_metrics_snapshot_id', 'snapshot_pipe_metrics', ['snapshot_id'],
+        postgresql_using='brin',
+    )
+
+    # Move existing payloads into the new tables
+    op.execute("""
+        INSERT INTO snapshot_node_metrics (snapshot_id, node_id, pressure, actual_demand)
+        SELECT s.id, p.key::int, p.value::float,
+               coalesce((s.node_actual_demand ->> p.key)::float, 0)
+        FROM simulation_snapshots s, LATERAL jsonb_each_text(s.node_pressures) p
+    """)
+    op.execute("""
+        INSERT INTO snapshot_pipe_metrics
+            (snapshot_id, pipe_id, flow_rate, velocity, pressure_drop, reynolds)
+        SELECT s.id, f.key::int, f.value::float,
+               coalesce((s.pipe_velocities ->> f.key)::float, 0),
+               coalesce((s.pipe_pressure_drops ->> f.key)::float, 0),
+               coalesce((s.pipe_reynolds ->> f.key)::float, 0)
+        FROM simulation_snapshots s, LATERAL jsonb_each_text(s.pipe_flow_rates) f
+    """)
+
+    # The views read the JSON columns; rebuild them over the metric tables
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_nodes")
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_pipes")
+    for column in METRIC_JSON_COLUMNS:
+        op.drop_column('simulation_snapshots', column)
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+        SELECT m.node_id, m.pressure, m.actual_demand
+        FROM snapshot_node_metrics m
+        JOIN simulation_snapshots s ON s.id = m.snapshot_id
+        WHERE s.is_current
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_nodes_node_id "
+        "ON mv_current_snapshot_nodes (node_id)"
+    )
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+        SELECT m.pipe_id, m.flow_rate, m.velocity, m.pressure_drop, m.reynolds
+        FROM snapshot_pipe_metrics m
+        JOIN simulation_snapshots s ON s.id = m.snapshot_id
+        WHERE s.is_current
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_pipes_pipe_id "
+        "ON mv_current_snapshot_pipes (pipe_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_pipes")
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_nodes")
+
+    for column in METRIC_JSON_COLUMNS:
+        op.add_column('simulation_snapshots', sa.Column(column, postgresql.JSONB(), nullable=True))
+    op.execute("""
+        UPDATE simulation_snapshots s SET
+            node_pressures = m.pressures,
+            node_actual_demand = m.demands
+        FROM (
+            SELECT snapshot_id,
+                   jsonb_object_agg(node_id::text, pressure) AS pressures,
+                   jsonb_object_agg(node_id::text, actual_demand) AS demands
+            FROM snapshot_node_metrics GROUP BY snapshot_id
+        ) m
+        WHERE s.id = m.snapshot_id
+    """)
+    op.execute("""
+        UPDATE simulation_snapshots s SET
+            pipe_flow_rates = m.flows,
+            pipe_velocities = m.velocities,
+            pipe_pressure_drops = m.drops,
+            pipe_reynolds = m.reynolds
+        FROM (
+            SELECT snapshot_id,
+                   jsonb_object_agg(pipe_id::text, flow_rate) AS flows,
+                   jsonb_object_agg(pipe_id::text, velocity) AS velocities,
+                   jsonb_object_agg(pipe_id::text, pressure_drop) AS drops,
+                   jsonb_object_agg(pipe_id::text, reynolds) AS reynolds
+            FROM snapshot_pipe_metrics GROUP BY snapshot_id
+        ) m
+        WHERE s.id = m.snapshot_id
+    """)
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+        SELECT p.key::int AS node_id,
+               p.value::float AS pressure,
+               (s.node_actual_demand ->> p.key)::float AS actual_demand
+        FROM simulation_snapshots s, LATERAL jsonb_each_text(s.node_pressures) p
+        WHERE s.is_current
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_nodes_node_id "
+        "ON mv_current_snapshot_nodes (node_id)"
+    )
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+        SELECT f.key::int AS pipe_id,
+               f.value::float AS flow_rate,
+               (s.pipe_velocities ->> f.key)::float AS velocity,
+               (s.pipe_pressure_drops ->> f.key)::float AS pressure_drop,
+               (s.pipe_reynolds ->> f.key)::float AS reynolds
+        FROM simulation_snapshots s, LATERAL jsonb_each_text(s.pipe_flow_rates) f
+        WHERE s.is_current
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_pipes_pipe_id "
+        "ON mv_current_snapshot_pipes (pipe_id)"
+    )
+
+    op.drop_index('ix_snapshot_pipe_metrics_snapshot_id', table_name='snapshot_pipe_metrics')
+    op.drop_table('snapshot_pipe_metrics')
+    op.drop_index('ix_snapshot_node_metrics_snapshot_id', table_name='snapshot_node_metrics')
+    op.drop_table('snapshot_node_metrics')
@@ -0,0 +1,180 @@
+"""Partition simulation_snapshots by month on created_at
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-04-15 00:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SNAPSHOT_COLUMNS = (
+    "id, source_pressure, demand_multiplier, active_leaks, warnings, "
+    "min_pressure, max_velocity, n_active_leaks, created_at, is_current"
+)
+
+# Monthly partitions created up front, starting at the current month; the
+# API creates later ones as it goes (crud.ensure_snapshot_partitions)
+MONTHS_AHEAD = 3
+
+NODES_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+    SELECT m.node_id, m.pressure, m.actual_demand
+    FROM snapshot_node_metrics m
+    JOIN simulation_snapshots s ON s.id = m.snapshot_id
+    WHERE s.is_current
+"""
+
+PIPES_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+    SELECT m.pipe_id, m.flow_rate, m.velocity, m.pressure_drop, m.reynolds
+    FROM snapshot_pipe_metrics m
+    JOIN simulation_snapshots s ON s.id = m.snapshot_id
+    WHERE s.is_current
+"""
+
+
+def _add_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _drop_views() -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_pipes")
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_nodes")
+
+
+def _create_views() -> None:
+    op.execute(NODES_VIEW_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_nodes_node_id "
+        "ON mv_current_snapshot_nodes (node_id)"
+    )
+    op.execute(PIPES_VIEW_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_pipes_pipe_id "
+        "ON mv_current_snapshot_pipes (pipe_id)"
+    )
+
+
+def upgrade() -> None:
+    _drop_views()
+
+    # A foreign key into a partitioned table would have to include created_at
+    op.drop_constraint('snapshot_node_metrics_snapshot_id_fkey', 'snapshot_node_metrics', type_='foreignkey')
+    op.drop_constraint('snapshot_pipe_metrics_snapshot_id_fkey', 'snapshot_pipe_metrics', type_='foreignkey')
+
+    op.execute("ALTER TABLE simulation_snapshots RENAME TO simulation_snapshots_old")
+    op.drop_index('ix_snapshots_current_recent', table_name='simulation_snapshots_old')
+    op.drop_index('ix_simulation_snapshots_is_current', table_name='simulation_snapshots_old')
+    op.execute("ALTER TABLE simulation_snapshots_old DROP CONSTRAINT simulation_snapshots_pkey")
+
+    op.execute("""
+        CREATE TABLE simulation_snapshots (
+            id integer NOT NULL DEFAULT nextval('simulation_snapshots_id_seq'),
+            source_pressure double precision NOT NULL,
+            demand_multiplier double precision,
+            active_leaks jsonb,
+            warnings jsonb,
+            min_pressure double precision,
+            max_velocity double precision,
+            n_active_leaks integer,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            is_current boolean,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE simulation_snapshots_id_seq OWNED BY simulation_snapshots.id")
+    op.execute("CREATE TABLE simulation_snapshots_default PARTITION OF simulation_snapshots DEFAULT")
+
+    month = date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        next_month = _add_month(month)
+        op.execute(
+            f"CREATE TABLE simulation_snapshots_{month:%Y_%m} PARTITION OF simulation_snapshots "
+            f"FOR VALUES FROM ('{month}') TO ('{next_month}')"
+        )
+        month = next_month
+
+    # Rows from before the current month land in the default partition
+    op.execute(f"""
+        INSERT INTO simulation_snapshots ({SNAPSHOT_COLUMNS})
+        SELECT id, source_pressure, demand_multiplier, active_leaks, warnings,
+               min_pressure, max_velocity, n_active_leaks,
+               coalesce(created_at, now()), is_current
+        FROM simulation_snapshots_old
+    """)
+    op.execute("DROP TABLE simulation_snapshots_old")
+
+    op.create_index(
+        'ix_snapshots_current_recent', 'simulation_snapshots', [sa.text('created_at DESC')],
+        postgresql_where=sa.text('is_current'),
+    )
+    op.create_index(
+        'ix_simulation_snapshots_created_at', 'simulation_snapshots', ['created_at'],
+        postgresql_using='brin',
+    )
+    op.create_index('ix_simulation_snapshots_is_current', 'simulation_snapshots', ['is_current'])
+
+    _create_views()
+
+
+def downgrade() -> None:
+    _drop_views()
+
+    op.execute("ALTER TABLE simulation_snapshots RENAME TO simulation_snapshots_partitioned")
+    op.execute("ALTER TABLE simulation_snapshots_partitioned DROP CONSTRAINT simulation_snapshots_pkey")
+    op.execute("""
+        CREATE TABLE simulation_snapshots (
+            id integer NOT NULL DEFAULT nextval('simulation_snapshots_id_seq'),
+            source_pressure double precision NOT NULL,
+            demand_multiplier double precision,
+            active_leaks jsonb,
+            warnings jsonb,
+            min_pressure double precision,
+            max_velocity double precision,
+            n_active_leaks integer,
+            created_at timestamp without time zone DEFAULT now(),
+            is_current boolean,
+            PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE simulation_snapshots_id_seq OWNED BY simulation_snapshots.id")
+    op.execute(f"""
+        INSERT INTO simulation_snapshots ({SNAPSHOT_COLUMNS})
+        SELECT {SNAPSHOT_COLUMNS} FROM simulation_snapshots_partitioned
+    """)
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE simulation_snapshots_partitioned")
+
+    op.create_index(
+        'ix_snapshots_current_recent', 'simulation_snapshots', [sa.text('created_at DESC')],
+        postgresql_where=sa.text('is_current'),
+    )
+    op.create_index('ix_simulation_snapshots_is_current', 'simulation_snapshots', ['is_current'])
+
+    # Metrics of snapshots whose partition was dropped have no parent row
+    for table in ('snapshot_node_metrics', 'snapshot_pipe_metrics'):
+        op.execute(
+            f"DELETE FROM {table} WHERE snapshot_id NOT IN (SELECT id FROM simulation_snapshots)"
+        )
+    op.create_foreign_key(
+        'snapshot_node_metrics_snapshot_id_fkey', 'snapshot_node_metrics', 'simulation_snapshots',
+        ['snapshot_id'], ['id'], ondelete='CASCADE',
+    )
+    op.create_foreign_key(
+        'snapshot_pipe_metrics_snapshot_id_fkey', 'snapshot_pipe_metrics', 'simulation_snapshots',
+        ['snapshot_id'], ['id'], ondelete='CASCADE',
+    )
+
+    _create_views()
@@ -0,0 +1,173 @@
+"""Partition snapshot metric tables by month alongside simulation_snapshots
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-04-22 00:00:00.000000
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> (key column, value columns)
+METRIC_TABLES = {
+    'snapshot_node_metrics': ('node_id', ('pressure', 'actual_demand')),
+    'snapshot_pipe_metrics': ('pipe_id', ('flow_rate', 'velocity', 'pressure_drop', 'reynolds')),
+}
+
+NODES_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+    SELECT m.node_id, m.pressure, m.actual_demand
+    FROM snapshot_node_metrics m
+    JOIN simulation_snapshots s ON s.id = m.snapshot_id AND s.created_at = m.created_at
+    WHERE s.is_current
+"""
+
+PIPES_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+    SELECT m.pipe_id, m.flow_rate, m.velocity, m.pressure_drop, m.reynolds
+    FROM snapshot_pipe_metrics m
+    JOIN simulation_snapshots s ON s.id = m.snapshot_id AND s.created_at = m.created_at
+    WHERE s.is_current
+"""
+
+# Views as of 007 (no created_at on the metric tables)
+OLD_NODES_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+    SELECT m.node_id, m.pressure, m.actual_demand
+    FROM snapshot_node_metrics m
+    JOIN simulation_snapshots s ON s.id = m.snapshot_id
+    WHERE s.is_current
+"""
+
+OLD_PIPES_VIEW_SQL = """
+    CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+    SELECT m.pipe_id, m.flow_rate, m.velocity, m.pressure_drop, m.reynolds
+    FROM snapshot_pipe_metrics m
+    JOIN simulation_snapshots s ON s.id = m.snapshot_id
+    WHERE s.is_current
+"""
+
+SNAPSHOT_PARTITION = re.compile(r"^simulation_snapshots_(\d{4})_(\d{2})$")
+
+
+def _snapshot_partition_bounds() -> list:
+    """(YYYY_MM suffix, FOR VALUES clause) of every monthly simulation_snapshots partition."""
+    rows = op.get_bind().execute(sa.text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'simulation_snapshots'::regclass
+    """))
+    bounds = []
+    for name, bound in rows:
+        match = SNAPSHOT_PARTITION.match(name)
+        if match:
+            # Reuse the exact FOR VALUES clause so metric months line up
+            bounds.append((f"{match.group(1)}_{match.group(2)}", bound))
+    return bounds
+
+
+def _drop_views() -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_pipes")
+    op.execute("DROP MATERIALIZED VIEW mv_current_snapshot_nodes")
+
+
+def _create_views(nodes_sql: str, pipes_sql: str) -> None:
+    op.execute(nodes_sql)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_nodes_node_id "
+        "ON mv_current_snapshot_nodes (node_id)"
+    )
+    op.execute(pipes_sql)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_current_snapshot_pipes_pipe_id "
+        "ON mv_current_snapshot_pipes (pipe_id)"
+    )
+
+
+def _value_columns_sql(values: tuple) -> str:
+    return ",\n".join(
+        f"            {column} double precision NOT NULL" for column in values
+    )
+
+
+def upgrade() -> None:
+    _drop_views()
+    partitions = _snapshot_partition_bounds()
+
+    for table, (key, values) in METRIC_TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        op.drop_index(f'ix_{table}_snapshot_id', table_name=f'{table}_old')
+        op.execute(f"ALTER TABLE {table}_old DROP CONSTRAINT {table}_pkey")
+
+        # created_at is copied from the parent snapshot, so a month of metrics
+        # lives in the partitions of the same name as its snapshots and the
+        # foreign key can point at the partitioned snapshots table again
+        op.execute(f"""
+            CREATE TABLE {table} (
+                snapshot_id integer NOT NULL,
+                {key} integer NOT NULL,
+{_value_columns_sql(values)},
+                created_at timestamp without time zone NOT NULL,
+                PRIMARY KEY (snapshot_id, {key}, created_at),
+                FOREIGN KEY (snapshot_id, created_at)
+                    REFERENCES simulation_snapshots (id, created_at) ON DELETE CASCADE
+            ) PARTITION BY RANGE (created_at)
+        """)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        for suffix, bound in partitions:
+            op.execute(f"CREATE TABLE {table}_{suffix} PARTITION OF {table} {bound}")
+
+        # Metrics whose snapshot is gone (possible since 007 dropped the
+        # foreign key) are left behind
+        columns = ("snapshot_id", key) + values
+        op.execute(f"""
+            INSERT INTO {table} ({", ".join(columns)}, created_at)
+            SELECT {", ".join(f"m.{column}" for column in columns)}, s.created_at
+            FROM {table}_old m JOIN simulation_snapshots s ON s.id = m.snapshot_id
+        """)
+        op.execute(f"DROP TABLE {table}_old")
+        op.create_index(
+            f'ix_{table}_snapshot_id', table, ['snapshot_id'], postgresql_using='brin',
+        )
+
+    _create_views(NODES_VIEW_SQL, PIPES_VIEW_SQL)
+
+
+def downgrade() -> None:
+    _drop_views()
+
+    for table, (key, values) in METRIC_TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.drop_index(f'ix_{table}_snapshot_id', table_name=f'{table}_partitioned')
+        op.execute(f"ALTER TABLE {table}_partitioned DROP CONSTRAINT {table}_pkey")
+        op.execute(f"""
+            CREATE TABLE {table} (
+                snapshot_id integer NOT NULL,
+                {key} integer NOT NULL,
+{_value_columns_sql(values)},
+                PRIMARY KEY (snapshot_id, {key})
+            )
+        """)
+        column_list = ", ".join(("snapshot_id", key) + values)
+        op.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM {table}_partitioned
+        """)
+        # Dropping the parent drops every partition with it
+        op.execute(f"DROP TABLE {table}_partitioned")
+        op.create_index(
+            f'ix_{table}_snapshot_id', table, ['snapshot_id'], postgresql_using='brin',
+        )
+
+    _create_views(OLD_NODES_VIEW_SQL, OLD_PIPES_VIEW_SQL)
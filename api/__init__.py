@@ -3,3 +3,11 @@ FastAPI Backend for Bentonville Gas Simulator
 =============================================
 Provides REST + WebSocket API for the React frontend.
 """
+
+import sys
+from pathlib import Path
+
+# The simulator modules (city_gen, physics, leak_detector) live at the repo root
+_ROOT = str(Path(__file__).parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
@@ -4,25 +4,53 @@ Database CRUD Operations
 Async database operations for the gas network.
 """
 
+import asyncio
+import time
+from datetime import date
 from typing import Optional
-from sqlalchemy import select, update, delete
+import asyncpg
+from sqlalchemy import select, insert, update, delete, any_, bindparam, func, text, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from api.models import Node, Pipe, Leak, SimulationSnapshot
+from api.database import DIRECT_DATABASE_URL, async_session
+from api.models import (
+    Node,
+    Pipe,
+    Leak,
+    SimulationSnapshot,
+    SnapshotNodeMetric,
+    SnapshotPipeMetric,
+    CURRENT_SNAPSHOT_VIEWS,
+    mv_current_snapshot_nodes,
+    mv_current_snapshot_pipes,
+)
+
+
+# Payloads at or above this many rows are loaded with COPY instead of INSERT
+COPY_THRESHOLD = 100
+
+# Hot-path statements are built once at import; values are bound per call,
+# so each hits the engine's compiled cache instead of being rebuilt.
 
 
 # ============ NODES ============
 
+_ALL_NODES = select(Node).order_by(Node.id)
+_NODE_BY_ID = select(Node).where(Node.id == bindparam("node_id"))
+_DELETE_NODE = delete(Node).where(Node.id == bindparam("node_id"))
+
+
 async def get_all_nodes(db: AsyncSession) -> list[Node]:
     """Get all nodes."""
-    result = await db.execute(select(Node).order_by(Node.id))
+    result = await db.execute(_ALL_NODES)
     return list(result.scalars().all())
 
 
 async def get_node(db: AsyncSession, node_id: int) -> Optional[Node]:
     """Get a single node by ID."""
-    result = await db.execute(select(Node).where(Node.id == node_id))
+    result = await db.execute(_NODE_BY_ID, {"node_id": node_id})
     return result.scalar_one_or_none()
 
 
@@ -46,22 +74,27 @@ async def update_node(db: AsyncSession, node_id: int, **kwargs) -> Optional[Node
 
 async def delete_node(db: AsyncSession, node_id: int) -> bool:
     """Delete a node."""
-    result = await db.execute(delete(Node).where(Node.id == node_id))
+    result = await db.execute(_DELETE_NODE, {"node_id": node_id})
     await db.commit()
     return result.rowcount > 0
 
 
 # ============ PIPES ============
 
+_ALL_PIPES = select(Pipe).order_by(Pipe.id)
+_PIPE_BY_ID = select(Pipe).where(Pipe.id == bindparam("pipe_id"))
+_DELETE_PIPE = delete(Pipe).where(Pipe.id == bindparam("pipe_id"))
+
+
 async def get_all_pipes(db: AsyncSession) -> list[Pipe]:
     """Get all pipes."""
-    result = await db.execute(select(Pipe).order_by(Pipe.id))
+    result = await db.execute(_ALL_PIPES)
     return list(result.scalars().all())
 
 
 async def get_pipe(db: AsyncSession, pipe_id: int) -> Optional[Pipe]:
     """Get a single pipe by ID."""
-    result = await db.execute(select(Pipe).where(Pipe.id == pipe_id))
+    result = await db.execute(_PIPE_BY_ID, {"pipe_id": pipe_id})
     return result.scalar_one_or_none()
 
 
@@ -76,20 +109,49 @@ async def create_pipe(db: AsyncSession, **kwargs) -> Pipe:
 
 async def delete_pipe(db: AsyncSession, pipe_id: int) -> bool:
     """Delete a pipe."""
-    result = await db.execute(delete(Pipe).where(Pipe.id == pipe_id))
+    result = await db.execute(_DELETE_PIPE, {"pipe_id": pipe_id})
     await db.commit()
     return result.rowcount > 0
 
 
 # ============ LEAKS ============
 
+_ACTIVE_LEAKS = (
+    select(Leak)
+    .where(Leak.cleared_at.is_(None))
+    .options(selectinload(Leak.node))
+)
+_ACTIVE_LEAKS_WITH_TOPOLOGY = (
+    select(Leak)
+    .where(Leak.cleared_at.is_(None))
+    .options(
+        selectinload(Leak.node).selectinload(Node.outgoing_pipes),
+        selectinload(Leak.node).selectinload(Node.incoming_pipes),
+    )
+)
+
+# cleared_at is stamped by the database clock, not the app server's
+_CLEAR_LEAK = (
+    update(Leak)
+    .where(Leak.id == bindparam("leak_id"), Leak.cleared_at.is_(None))
+    .values(cleared_at=func.now())
+)
+_CLEAR_ALL_LEAKS = (
+    update(Leak)
+    .where(Leak.cleared_at.is_(None))
+    .values(cleared_at=func.now())
+)
+
+
 async def get_active_leaks(db: AsyncSession) -> list[Leak]:
     """Get all active (not cleared) leaks."""
-    result = await db.execute(
-        select(Leak)
-        .where(Leak.cleared_at.is_(None))
-        .options(selectinload(Leak.node))
-    )
+    result = await db.execute(_ACTIVE_LEAKS)
+    return list(result.scalars().all())
+
+
+async def get_active_leaks_with_topology(db: AsyncSession) -> list[Leak]:
+    """Get active leaks with each leak's node and its incoming/outgoing pipes loaded."""
+    result = await db.execute(_ACTIVE_LEAKS_WITH_TOPOLOGY)
     return list(result.scalars().all())
 
 
@@ -104,39 +166,150 @@ async def create_leak(db: AsyncSession, node_id: int, severity: float = 1.0) ->
 
 async def clear_leak(db: AsyncSession, leak_id: int) -> bool:
     """Clear (fix) a leak."""
-    from datetime import datetime
-    result = await db.execute(
-        update(Leak)
-        .where(Leak.id == leak_id, Leak.cleared_at.is_(None))
-        .values(cleared_at=datetime.utcnow())
-    )
+    result = await db.execute(_CLEAR_LEAK, {"leak_id": leak_id})
     await db.commit()
     return result.rowcount > 0
 
 
 async def clear_all_leaks(db: AsyncSession) -> int:
     """Clear all active leaks."""
-    from datetime import datetime
-    result = await db.execute(
-        update(Leak)
-        .where(Leak.cleared_at.is_(None))
-        .values(cleared_at=datetime.utcnow())
-    )
+    result = await db.execute(_CLEAR_ALL_LEAKS)
     await db.commit()
     return result.rowcount
 
 
 # ============ SIMULATION SNAPSHOTS ============
 
+_CURRENT_SNAPSHOT = (
+    select(SimulationSnapshot)
+    .where(SimulationSnapshot.is_current == True)
+    .order_by(SimulationSnapshot.created_at.desc())
+    .limit(1)
+)
+_CURRENT_NODE_METRICS = select(mv_current_snapshot_nodes).order_by(mv_current_snapshot_nodes.c.node_id)
+_CURRENT_PIPE_METRICS = select(mv_current_snapshot_pipes).order_by(mv_current_snapshot_pipes.c.pipe_id)
+
+_SNAPSHOT_NODE_METRICS = (
+    select(SnapshotNodeMetric)
+    .where(SnapshotNodeMetric.snapshot_id == bindparam("snapshot_id"))
+    .order_by(SnapshotNodeMetric.node_id)
+)
+_SNAPSHOT_PIPE_METRICS = (
+    select(SnapshotPipeMetric)
+    .where(SnapshotPipeMetric.snapshot_id == bindparam("snapshot_id"))
+    .order_by(SnapshotPipeMetric.pipe_id)
+)
+_NODE_PRESSURE_HISTORY = (
+    select(SnapshotNodeMetric.snapshot_id, SnapshotNodeMetric.pressure)
+    .where(SnapshotNodeMetric.node_id == bindparam("node_id"))
+    .order_by(SnapshotNodeMetric.snapshot_id.desc())
+    .limit(bindparam("limit"))
+)
+
+NODE_METRIC_COLUMNS = ["snapshot_id", "node_id", "pressure", "actual_demand", "created_at"]
+PIPE_METRIC_COLUMNS = [
+    "snapshot_id", "pipe_id", "flow_rate", "velocity", "pressure_drop", "reynolds", "created_at"
+]
+
+# Postgres channel used to tell other workers the current snapshot changed
+SNAPSHOT_CHANNEL = "snapshot_updated"
+
+# Process-local copy of the current snapshot, set by save_snapshot. Only
+# used while the listener is connected: without it, saves from other
+# workers would go unnoticed.
+_current_snapshot: Optional[SimulationSnapshot] = None
+_snapshot_listener: Optional[asyncpg.Connection] = None
+_listener_reconnect_task: Optional[asyncio.Task] = None
+
+# Backoff between reconnect attempts after the listener connection drops
+LISTENER_RECONNECT_DELAY = 1.0
+LISTENER_RECONNECT_MAX_DELAY = 30.0
+
+
+def invalidate_snapshot_cache() -> None:
+    """Drop the cached current snapshot so the next read hits the database."""
+    global _current_snapshot
+    _current_snapshot = None
+
+
+def _snapshot_cache_enabled() -> bool:
+    return _snapshot_listener is not None and not _snapshot_listener.is_closed()
+
+
+def _on_snapshot_updated(connection, pid, channel, payload: str) -> None:
+    """NOTIFY callback: another worker saved a snapshot we don't have."""
+    if _current_snapshot is None or str(_current_snapshot.id) != payload:
+        invalidate_snapshot_cache()
+
+
+def _on_snapshot_listener_lost(connection) -> None:
+    """Termination callback: stop caching and reconnect in the background."""
+    global _snapshot_listener, _listener_reconnect_task
+    if connection is not _snapshot_listener:
+        # Closed by stop_snapshot_listener
+        return
+    _snapshot_listener = None
+    invalidate_snapshot_cache()
+    print("⚠️ Snapshot listener connection lost, reconnecting")
+    _listener_reconnect_task = asyncio.create_task(_reconnect_snapshot_listener())
+
+
+async def _connect_snapshot_listener() -> None:
+    global _snapshot_listener
+    connection = await asyncpg.connect(DIRECT_DATABASE_URL.replace("+asyncpg", ""))
+    try:
+        await connection.add_listener(SNAPSHOT_CHANNEL, _on_snapshot_updated)
+    except Exception:
+        await connection.close()
+        raise
+    connection.add_termination_listener(_on_snapshot_listener_lost)
+    # NOTIFYs sent before LISTEN took effect were missed
+    invalidate_snapshot_cache()
+    _snapshot_listener = connection
+
+
+async def _reconnect_snapshot_listener() -> None:
+    delay = LISTENER_RECONNECT_DELAY
+    while _snapshot_listener is None:
+        await asyncio.sleep(delay)
+        try:
+            await _connect_snapshot_listener()
+        except Exception as e:
+            print(f"⚠️ Snapshot listener reconnect failed: {e}")
+            delay = min(delay * 2, LISTENER_RECONNECT_MAX_DELAY)
+
+
+async def start_snapshot_listener() -> None:
+    """LISTEN for snapshot updates on a dedicated, direct connection."""
+    if DIRECT_DATABASE_URL is None:
+        print("⚠️ DIRECT_DATABASE_URL not set behind PgBouncer, snapshot cache disabled")
+        return
+    await _connect_snapshot_listener()
+
+
+async def stop_snapshot_listener() -> None:
+    """Close the LISTEN connection."""
+    global _snapshot_listener, _listener_reconnect_task
+    if _listener_reconnect_task is not None:
+        _listener_reconnect_task.cancel()
+        _listener_reconnect_task = None
+    if _snapshot_listener is not None:
+        connection, _snapshot_listener = _snapshot_listener, None
+        await connection.close()
+    invalidate_snapshot_cache()
+
+
 async def get_current_snapshot(db: AsyncSession) -> Optional[SimulationSnapshot]:
-    """Get the current simulation snapshot."""
-    result = await db.execute(
-        select(SimulationSnapshot)
-        .where(SimulationSnapshot.is_current == True)
-        .order_by(SimulationSnapshot.created_at.desc())
-        .limit(1)
-    )
-    return result.scalar_one_or_none()
+    """Get the current simulation snapshot (cached in-process while listening)."""
+    global _current_snapshot
+    cache_enabled = _snapshot_cache_enabled()
+    if cache_enabled and _current_snapshot is not None:
+        return _current_snapshot
+    result = await db.execute(_CURRENT_SNAPSHOT)
+    snapshot = result.scalar_one_or_none()
+    if cache_enabled:
+        _current_snapshot = snapshot
+    return snapshot
 
 
 async def save_snapshot(
@@ -152,60 +325,384 @@ async def save_snapshot(
     active_leaks: dict,
     warnings: list,
 ) -> SimulationSnapshot:
-    """Save a new simulation snapshot and mark it as current."""
-    # Unmark previous current snapshots
-    await db.execute(
+    """
+    Save a new simulation snapshot, mark it as current and notify listeners.
+    
+    Unmarking the previous current snapshot and inserting the new one is a
+    single statement (a writable CTE); the per-node / per-pipe results are
+    then streamed into the metric tables with COPY, stamped with the
+    snapshot's created_at so they land in the same month's partitions.
+    Everything is committed once without waiting on fsync: snapshots are
+    derived data and can be recomputed after a crash.
+    """
+    global _current_snapshot
+    await ensure_snapshot_partitions(db)
+    cleared = (
         update(SimulationSnapshot)
         .where(SimulationSnapshot.is_current == True)
         .values(is_current=False)
+        .returning(SimulationSnapshot.id)
+        .cte("cleared")
     )
-    
-    # Create new snapshot
-    snapshot = SimulationSnapshot(
-        source_pressure=source_pressure,
-        demand_multiplier=demand_multiplier,
-        node_pressures=node_pressures,
-        pipe_flow_rates=pipe_flow_rates,
-        node_actual_demand=node_actual_demand,
-        pipe_velocities=pipe_velocities,
-        pipe_pressure_drops=pipe_pressure_drops,
-        pipe_reynolds=pipe_reynolds,
-        active_leaks=active_leaks,
-        warnings=warnings,
-        is_current=True,
+    stmt = (
+        insert(SimulationSnapshot)
+        .values(
+            source_pressure=source_pressure,
+            demand_multiplier=demand_multiplier,
+            active_leaks=active_leaks,
+            warnings=warnings,
+            min_pressure=min(node_pressures.values(), default=None),
+            max_velocity=max(map(abs, pipe_velocities.values()), default=None),
+            n_active_leaks=len(active_leaks),
+            is_current=True,
+        )
+        .add_cte(cleared)
+        .returning(SimulationSnapshot)
+    )
+    await db.execute(text("SET LOCAL synchronous_commit = off"))
+    snapshot = await db.scalar(stmt)
+    await _copy_records(
+        db,
+        SnapshotNodeMetric.__tablename__,
+        NODE_METRIC_COLUMNS,
+        [
+            (
+                snapshot.id,
+                int(node_id),
+                pressure,
+                node_actual_demand.get(node_id, 0.0),
+                snapshot.created_at,
+            )
+            for node_id, pressure in node_pressures.items()
+        ],
+    )
+    await _copy_records(
+        db,
+        SnapshotPipeMetric.__tablename__,
+        PIPE_METRIC_COLUMNS,
+        [
+            (
+                snapshot.id,
+                int(pipe_id),
+                flow_rate,
+                pipe_velocities.get(pipe_id, 0.0),
+                pipe_pressure_drops.get(pipe_id, 0.0),
+                pipe_reynolds.get(pipe_id, 0.0),
+                snapshot.created_at,
+            )
+            for pipe_id, flow_rate in pipe_flow_rates.items()
+        ],
+    )
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": SNAPSHOT_CHANNEL, "payload": str(snapshot.id)},
     )
-    db.add(snapshot)
     await db.commit()
-    await db.refresh(snapshot)
+    if _snapshot_cache_enabled():
+        _current_snapshot = snapshot
+    schedule_current_snapshot_views_refresh()
     return snapshot
 
 
+async def refresh_current_snapshot_views(db: AsyncSession) -> None:
+    """Re-materialize the flat current-snapshot views without blocking readers."""
+    for view in CURRENT_SNAPSHOT_VIEWS:
+        await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+    await db.commit()
+
+
+# Saves within this many seconds of each other share one view refresh
+VIEWS_REFRESH_DELAY = 1.0
+
+_views_refresh_task: Optional[asyncio.Task] = None
+_views_stale = False
+
+
+def schedule_current_snapshot_views_refresh() -> None:
+    """
+    Refresh the current-snapshot views in the background, debounced.
+    
+    Keeps the two REFRESH MATERIALIZED VIEW statements off the write path:
+    a burst of saves (slider drags) is followed by a single refresh, and a
+    failed refresh is logged instead of failing a save that already
+    committed.
+    """
+    global _views_refresh_task, _views_stale
+    _views_stale = True
+    if _views_refresh_task is None or _views_refresh_task.done():
+        _views_refresh_task = asyncio.create_task(_refresh_stale_views())
+
+
+async def _refresh_stale_views() -> None:
+    global _views_stale
+    # Saves landing during the delay or the refresh itself mark the views
+    # stale again and get another pass
+    while _views_stale:
+        _views_stale = False
+        await asyncio.sleep(VIEWS_REFRESH_DELAY)
+        try:
+            async with async_session() as db:
+                await refresh_current_snapshot_views(db)
+        except Exception as e:
+            print(f"⚠️ Current snapshot view refresh failed: {e}")
+
+
+async def get_snapshot_node_metrics(db: AsyncSession, snapshot_id: int) -> list[SnapshotNodeMetric]:
+    """Per-node results of one snapshot."""
+    result = await db.execute(_SNAPSHOT_NODE_METRICS, {"snapshot_id": snapshot_id})
+    return list(result.scalars().all())
+
+
+async def get_snapshot_pipe_metrics(db: AsyncSession, snapshot_id: int) -> list[SnapshotPipeMetric]:
+    """Per-pipe results of one snapshot."""
+    result = await db.execute(_SNAPSHOT_PIPE_METRICS, {"snapshot_id": snapshot_id})
+    return list(result.scalars().all())
+
+
+async def get_node_pressure_history(db: AsyncSession, node_id: int, limit: int = 100) -> list:
+    """(snapshot_id, pressure) rows for one node over the most recent snapshots."""
+    result = await db.execute(_NODE_PRESSURE_HISTORY, {"node_id": node_id, "limit": limit})
+    return list(result.all())
+
+
+async def get_current_node_metrics(db: AsyncSession) -> list:
+    """Per-node (node_id, pressure, actual_demand) rows of the current snapshot."""
+    result = await db.execute(_CURRENT_NODE_METRICS)
+    return list(result.all())
+
+
+async def get_current_pipe_metrics(db: AsyncSession) -> list:
+    """Per-pipe (pipe_id, flow_rate, velocity, pressure_drop, reynolds) rows of the current snapshot."""
+    result = await db.execute(_CURRENT_PIPE_METRICS)
+    return list(result.all())
+
+
+# Tables range-partitioned by month on created_at; a month's partitions of
+# all three are created and dropped together
+PARTITIONED_SNAPSHOT_TABLES = (
+    SimulationSnapshot.__tablename__,
+    SnapshotNodeMetric.__tablename__,
+    SnapshotPipeMetric.__tablename__,
+)
+
+# Months whose partitions this process has already created
+_partitioned_months: set[date] = set()
+# time.monotonic() at which the database's current month ends; until then
+# ensure_snapshot_partitions has nothing left to check
+_partitions_checked_until = 0.0
+
+# The database clock stamps created_at, so months are taken from it
+_DB_MONTH = text(
+    "SELECT date_trunc('month', now())::date AS month, "
+    "extract(epoch FROM date_trunc('month', now()) + interval '1 month' - now()) AS seconds_left"
+)
+
+
+def _month_start(year: int, month: int) -> date:
+    """First day of year/month; anything but a real month raises."""
+    if type(year) is not int or type(month) is not int:
+        raise TypeError(f"year and month must be ints, got {year!r}, {month!r}")
+    return date(year, month, 1)  # ValueError for month outside 1..12
+
+
+def _next_month(start: date) -> date:
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _partition_name(table: str, start: date) -> str:
+    return f"{table}_{start:%Y_%m}"
+
+
+async def create_snapshot_partition(db: AsyncSession, year: int, month: int) -> None:
+    """
+    Create the simulation_snapshots and metric partitions for year/month.
+    
+    Create partitions ahead of time: Postgres refuses to attach a range
+    that already has rows sitting in the default partition.
+    ensure_snapshot_partitions does this for the current and next month.
+    """
+    start = _month_start(year, month)
+    # Identifiers and bounds are rendered from the validated date only
+    bounds = f"FROM ('{start.isoformat()}') TO ('{_next_month(start).isoformat()}')"
+    # Serialize with other workers: concurrent CREATE ... IF NOT EXISTS can still collide
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext('snapshot_partitions'))"))
+    for table in PARTITIONED_SNAPSHOT_TABLES:
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(table, start)} "
+            f"PARTITION OF {table} FOR VALUES {bounds}"
+        ))
+    await db.commit()
+    _partitioned_months.add(start)
+
+
+async def ensure_snapshot_partitions(db: AsyncSession) -> None:
+    """
+    Make sure the partitions for the current and next month exist.
+    
+    Called at startup and before every save_snapshot. The month comes from
+    the database clock, which stamps created_at, rather than from this
+    process; once its partitions exist, calls until the database's month
+    ends are a clock comparison.
+    """
+    global _partitions_checked_until
+    if time.monotonic() < _partitions_checked_until:
+        return
+    row = (await db.execute(_DB_MONTH)).one()
+    checked_at = time.monotonic()
+    for start in (row.month, _next_month(row.month)):
+        if start not in _partitioned_months:
+            await create_snapshot_partition(db, start.year, start.month)
+    _partitions_checked_until = checked_at + float(row.seconds_left)
+
+
+async def drop_snapshot_partition(db: AsyncSession, year: int, month: int) -> None:
+    """
+    Drop a month of snapshots and their metrics by dropping that month's
+    partitions of all three tables; no rows are deleted one by one.
+    
+    The metric partitions go first: the snapshot partition can only be
+    detached once no metric rows reference it (the metric foreign key
+    would otherwise block the detach).
+    """
+    global _partitions_checked_until
+    start = _month_start(year, month)
+    for table in (SnapshotNodeMetric.__tablename__, SnapshotPipeMetric.__tablename__):
+        await db.execute(text(f"DROP TABLE IF EXISTS {_partition_name(table, start)}"))
+    partition = _partition_name(SimulationSnapshot.__tablename__, start)
+    await db.execute(text(
+        f"ALTER TABLE {SimulationSnapshot.__tablename__} DETACH PARTITION {partition}"
+    ))
+    await db.execute(text(f"DROP TABLE {partition}"))
+    await db.commit()
+    _partitioned_months.discard(start)
+    # The dropped month may be one ensure_snapshot_partitions relies on
+    _partitions_checked_until = 0.0
+    invalidate_snapshot_cache()
+
+
 # ============ BULK OPERATIONS ============
 
+async def _copy_records(
+    db: AsyncSession, table: str, columns: list[str], records: list[tuple]
+) -> None:
+    """Stream records into a table over the raw asyncpg connection using COPY."""
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table, records=records, columns=columns
+    )
+
+
+def _to_copy_rows(rows_data: list[dict]) -> tuple[list[str], list[tuple]]:
+    """Flatten row dicts into COPY columns + tuples (timestamps come from server defaults)."""
+    columns = list(rows_data[0].keys())
+    records = [tuple(data[col] for col in columns) for data in rows_data]
+    return columns, records
+
+
+async def _copy_insert_ignore(
+    db: AsyncSession, table: str, columns: list[str], records: list[tuple]
+) -> list[int]:
+    """
+    COPY records into a temporary staging table, then move them across with
+    INSERT ... ON CONFLICT DO NOTHING. Returns the ids actually inserted.
+    """
+    staging = f"_staging_{table}"
+    column_list = ", ".join(columns)
+    await db.execute(text(
+        f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    await _copy_records(db, staging, columns, records)
+    result = await db.execute(text(
+        f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+        "ON CONFLICT DO NOTHING RETURNING id"
+    ))
+    return list(result.scalars())
+
+
+async def _fetch_by_ids(db: AsyncSession, model, ids: list[int]) -> list:
+    """Select rows by id in a single round trip (COPY cannot return them)."""
+    if not ids:
+        return []
+    result = await db.scalars(
+        select(model)
+        .where(model.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+        .order_by(model.id)
+    )
+    return list(result)
+
+
+async def bulk_copy_nodes(db: AsyncSession, columns: list[str], rows: list[tuple]) -> list[int]:
+    """Load node tuples (ordered as ``columns``) with COPY, skipping existing ids, and commit."""
+    ids = await _copy_insert_ignore(db, Node.__tablename__, columns, rows)
+    await db.commit()
+    return ids
+
+
+async def bulk_copy_pipes(db: AsyncSession, columns: list[str], rows: list[tuple]) -> list[int]:
+    """Load pipe tuples (ordered as ``columns``) with COPY, skipping existing ids, and commit."""
+    ids = await _copy_insert_ignore(db, Pipe.__tablename__, columns, rows)
+    await db.commit()
+    return ids
+
+
 async def bulk_create_nodes(db: AsyncSession, nodes_data: list[dict]) -> list[Node]:
-    """Bulk create nodes."""
-    nodes = [Node(**data) for data in nodes_data]
-    db.add_all(nodes)
+    """
+    Bulk create nodes, idempotently.
+
+    Rows whose id already exists are skipped (ON CONFLICT DO NOTHING), so a
+    retried or partial load can simply be resent; only the newly inserted
+    nodes are returned. Small payloads go through a single INSERT ...
+    RETURNING round trip; payloads of COPY_THRESHOLD rows or more are
+    streamed with COPY and re-fetched in one SELECT.
+    """
+    if not nodes_data:
+        return []
+    if len(nodes_data) >= COPY_THRESHOLD:
+        columns, rows = _to_copy_rows(nodes_data)
+        ids = await bulk_copy_nodes(db, columns, rows)
+        return await _fetch_by_ids(db, Node, ids)
+    result = await db.scalars(
+        pg_insert(Node).on_conflict_do_nothing(index_elements=["id"]).returning(Node),
+        nodes_data,
+    )
+    nodes = list(result)
     await db.commit()
-    for node in nodes:
-        await db.refresh(node)
     return nodes
 
 
 async def bulk_create_pipes(db: AsyncSession, pipes_data: list[dict]) -> list[Pipe]:
-    """Bulk create pipes."""
-    pipes = [Pipe(**data) for data in pipes_data]
-    db.add_all(pipes)
+    """
+    Bulk create pipes, idempotently.
+
+    Uses the same conflict handling and INSERT/COPY split as bulk_create_nodes.
+    """
+    if not pipes_data:
+        return []
+    if len(pipes_data) >= COPY_THRESHOLD:
+        columns, rows = _to_copy_rows(pipes_data)
+        ids = await bulk_copy_pipes(db, columns, rows)
+        return await _fetch_by_ids(db, Pipe, ids)
+    result = await db.scalars(
+        pg_insert(Pipe).on_conflict_do_nothing(index_elements=["id"]).returning(Pipe),
+        pipes_data,
+    )
+    pipes = list(result)
     await db.commit()
-    for pipe in pipes:
-        await db.refresh(pipe)
     return pipes
 
 
 async def clear_network(db: AsyncSession) -> None:
-    """Clear all network data (for testing/reset)."""
-    await db.execute(delete(Leak))
-    await db.execute(delete(SimulationSnapshot))
-    await db.execute(delete(Pipe))
-    await db.execute(delete(Node))
+    """
+    Clear all network data (for testing/reset).
+    
+    TRUNCATE drops the table contents and resets the id sequences in one
+    catalog operation instead of deleting (and WAL-logging) every row.
+    """
+    await db.execute(text(
+        "TRUNCATE TABLE snapshot_node_metrics, snapshot_pipe_metrics, leaks, "
+        "simulation_snapshots, pipes, nodes RESTART IDENTITY CASCADE"
+    ))
     await db.commit()
+    invalidate_snapshot_cache()
+    schedule_current_snapshot_views_refresh()
@@ -5,6 +5,7 @@ SQLAlchemy async setup for PostgreSQL.
 """
 
 import os
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
@@ -17,12 +18,37 @@ DATABASE_URL = os.getenv(
 # For sync operations (Alembic migrations)
 SYNC_DATABASE_URL = DATABASE_URL.replace("+asyncpg", "")
 
+# Connection pool sizing: cores * 2 + 1 is a sane default for SSD-backed
+# Postgres. Behind PgBouncer in transaction mode this can be smaller still,
+# since PgBouncer does the real multiplexing.
+_cores = os.cpu_count() or 4
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", _cores * 2 + 1))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", DB_POOL_SIZE))
+
+# PgBouncer transaction pooling can't keep prepared statements across
+# transactions, so asyncpg's statement cache must be disabled
+USE_PGBOUNCER = os.getenv("USE_PGBOUNCER", "false").lower() == "true"
+_connect_args = (
+    {"server_settings": {"jit": "off"}, "statement_cache_size": 0}
+    if USE_PGBOUNCER else {}
+)
+
+# LISTEN needs a session-level connection, which PgBouncer in transaction
+# mode can't hold, so the snapshot listener connects to Postgres directly.
+# Behind PgBouncer without DIRECT_DATABASE_URL no listener runs.
+DIRECT_DATABASE_URL = os.getenv("DIRECT_DATABASE_URL") or (
+    None if USE_PGBOUNCER else DATABASE_URL
+)
+
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,  # Set True for SQL logging
-    pool_size=5,
-    max_overflow=10,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args=_connect_args,
 )
 
 # Session factory
@@ -38,8 +64,8 @@ class Base(DeclarativeBase):
     pass
 
 
-async def get_db() -> AsyncSession:
-    """Dependency for FastAPI routes to get a database session."""
+async def get_db_rw() -> AsyncSession:
+    """Dependency for FastAPI routes that write: commits on success, rolls back on error."""
     async with async_session() as session:
         try:
             yield session
@@ -51,6 +77,27 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_db_ro() -> AsyncSession:
+    """
+    Dependency for read-only FastAPI routes.
+    
+    The transaction is declared READ ONLY (no xid assignment or WAL) and is
+    rolled back rather than committed, so the connection goes back to the
+    pool as soon as the route returns.
+    """
+    async with async_session() as session:
+        try:
+            await session.execute(text("SET TRANSACTION READ ONLY"))
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
+
+# Backwards-compatible name for the read-write dependency
+get_db = get_db_rw
+
+
 async def init_db():
     """Create all tables (for development). Use Alembic in production."""
     async with engine.begin() as conn:
@@ -9,10 +9,11 @@ import asyncio
 import os
 from contextlib import asynccontextmanager
 from typing import List, Set
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-import json
+import orjson
 
 from api.schemas import (
     HealthResponse,
@@ -33,7 +34,8 @@ from api.schemas import (
     WSMessageType,
 )
 from api.state import AppState
-from api.database import init_db, close_db, get_db
+from api import crud
+from api.database import init_db, close_db, get_db, async_session
 
 
 # ============================================================================
@@ -47,6 +49,13 @@ app_state = AppState()
 # WebSocket Connection Manager
 # ============================================================================
 
+def dumps(message: dict) -> str:
+    """Serialize a WebSocket message (numpy values and int keys allowed)."""
+    return orjson.dumps(
+        message, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates."""
     
@@ -66,30 +75,103 @@ class ConnectionManager:
         """Send message to all connected clients."""
         if not self.active_connections:
             return
-        
-        message_json = json.dumps(message)
-        disconnected = set()
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception:
-                disconnected.add(connection)
+        await self.broadcast_text(dumps(message))
+    
+    async def broadcast_text(self, message_json: str):
+        """Send an already-serialized message to all connected clients concurrently."""
+        # Snapshot: connections may come and go while sends are in flight
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(message_json) for connection in connections),
+            return_exceptions=True,
+        )
         
         # Clean up dead connections
-        self.active_connections -= disconnected
+        self.active_connections -= {
+            connection
+            for connection, result in zip(connections, results)
+            if isinstance(result, Exception)
+        }
+    
+    def simulation_update_json(self, state: SimulationResponse) -> str:
+        """Serialized SIMULATION_UPDATE for state, built once and kept on the response."""
+        if state._message_json is None:
+            state._message_json = dumps({
+                "type": WSMessageType.SIMULATION_UPDATE.value,
+                "payload": state.cached_dump()
+            })
+        return state._message_json
     
-    async def broadcast_simulation_update(self, state: SimulationResponse):
-        """Broadcast simulation state to all clients."""
-        await self.broadcast({
-            "type": WSMessageType.SIMULATION_UPDATE.value,
-            "payload": state.model_dump()
-        })
+    async def broadcast_simulation_update(
+        self, state: SimulationResponse, injected_node_ids: List[int] | None = None
+    ):
+        """
+        Broadcast simulation state to all clients.
+        
+        After a leak injection the injected ids ride along in the same
+        SIMULATION_UPDATE (payload.injected_node_ids) rather than in a
+        separate LEAK_ALERT.
+        """
+        if not self.active_connections:
+            return
+        if injected_node_ids is None:
+            await self.broadcast_text(self.simulation_update_json(state))
+        else:
+            await self.broadcast({
+                "type": WSMessageType.SIMULATION_UPDATE.value,
+                "payload": {**state.cached_dump(), "injected_node_ids": injected_node_ids}
+            })
 
 
 manager = ConnectionManager()
 
 
+class SimulationCoalescer:
+    """
+    Collapses bursts of parameter changes from one WebSocket client.
+    
+    Slider drags send many SET_PRESSURE / SET_DEMAND_MULTIPLIER messages per
+    second; only the latest value matters, so handlers record it here and a
+    single drain task runs at most one simulation per DELAY seconds.
+    """
+    
+    DELAY = 0.03  # seconds
+    
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.latest_params: dict = {}
+        self._event = asyncio.Event()
+        self._task = asyncio.create_task(self._drain_and_simulate())
+    
+    def submit(self, **params):
+        """Record the latest value for each parameter and wake the drain task."""
+        self.latest_params.update(params)
+        self._event.set()
+    
+    async def _drain_and_simulate(self):
+        while True:
+            await self._event.wait()
+            await asyncio.sleep(self.DELAY)
+            self._event.clear()
+            params, self.latest_params = self.latest_params, {}
+            try:
+                result = app_state.run_simulation(**params)
+                await manager.broadcast_simulation_update(result)
+            except Exception as e:
+                # The client may be gone; a failed error report must not end
+                # the drain loop (later submits would never be simulated)
+                try:
+                    await self.websocket.send_text(dumps({
+                        "type": WSMessageType.ERROR.value,
+                        "payload": {"message": str(e)}
+                    }))
+                except Exception:
+                    pass
+    
+    def cancel(self):
+        self._task.cancel()
+
+
 # ============================================================================
 # Lifespan (startup/shutdown)
 # ============================================================================
@@ -105,6 +187,9 @@ async def lifespan(app: FastAPI):
     if use_db:
         try:
             await init_db()
+            async with async_session() as db:
+                await crud.ensure_snapshot_partitions(db)
+            await crud.start_snapshot_listener()
             print("✅ PostgreSQL database connected")
         except Exception as e:
             print(f"⚠️ Database connection failed: {e}")
@@ -118,6 +203,7 @@ async def lifespan(app: FastAPI):
     # Shutdown: Close database connections
     print("👋 Shutting down API...")
     if use_db:
+        await crud.stop_snapshot_listener()
         await close_db()
 
 
@@ -153,6 +239,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Simulation payloads are large float dicts and compress well. WebSocket
+# frames are compressed separately via uvicorn's permessage-deflate
+# (--ws-per-message-deflate, see Procfile).
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # ============================================================================
 # Health Check
@@ -210,7 +301,11 @@ async def run_simulation(request: SimulationRequest):
 @app.get("/api/simulation/state", response_model=SimulationResponse, tags=["Simulation"])
 async def get_simulation_state():
     """Get the current simulation state without re-running."""
-    return app_state.get_current_simulation_state()
+    # Polled between simulations, so send the pre-serialized bytes as-is
+    return Response(
+        content=app_state.get_current_simulation_json(),
+        media_type="application/json",
+    )
 
 
 # ============================================================================
@@ -220,7 +315,7 @@ async def get_simulation_state():
 @app.post("/api/leaks/detect", response_model=LeakDetectionResponse, tags=["Leaks"])
 async def detect_leaks(request: LeakDetectionRequest):
     """Run leak detection with the specified strategy."""
-    return app_state.detect_leaks(request.strategy.value, request.num_sensors, request.sensor_node_ids)
+    return app_state.detect_leaks(request.strategy, request.num_sensors, request.sensor_node_ids)
 
 
 @app.post("/api/leaks/inject", response_model=InjectLeaksResponse, tags=["Leaks"])
@@ -228,15 +323,9 @@ async def inject_leaks(request: InjectLeaksRequest):
     """Inject leaks into the network. Replaces any existing leaks."""
     result = app_state.inject_leaks(request.count, request.node_ids)
     
-    # Broadcast leak alert to all WebSocket clients
-    await manager.broadcast({
-        "type": WSMessageType.LEAK_ALERT.value,
-        "payload": {"injected_node_ids": result.injected_node_ids}
-    })
-    
-    # Also broadcast updated simulation state so clients see active_leaks
+    # One broadcast: updated simulation state (with active_leaks) plus the injected ids
     sim_state = app_state.get_current_simulation_state()
-    await manager.broadcast_simulation_update(sim_state)
+    await manager.broadcast_simulation_update(sim_state, result.injected_node_ids)
     
     return result
 
@@ -281,50 +370,44 @@ async def websocket_endpoint(websocket: WebSocket):
     
     Server broadcasts:
     - SIMULATION_UPDATE: Full simulation state after changes
+      (after INJECT_LEAK, payload.injected_node_ids lists the new leaks)
     - NETWORK_UPDATE: Network topology changed
-    - LEAK_ALERT: New leaks detected or injected
     """
     await manager.connect(websocket)
     
     # Send current state on connect
     try:
         current_state = app_state.get_current_simulation_state()
-        await websocket.send_text(json.dumps({
-            "type": WSMessageType.SIMULATION_UPDATE.value,
-            "payload": current_state.model_dump()
-        }))
+        await websocket.send_text(manager.simulation_update_json(current_state))
     except Exception as e:
         print(f"Error sending initial state: {e}")
     
+    coalescer = SimulationCoalescer(websocket)
+    
     try:
         while True:
             # Receive message from client
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             msg_type = message.get("type")
             payload = message.get("payload", {})
             
             try:
                 if msg_type == WSMessageType.SET_PRESSURE.value:
-                    value = payload.get("value", 400.0)
-                    result = app_state.run_simulation(source_pressure=value)
-                    await manager.broadcast_simulation_update(result)
+                    coalescer.submit(source_pressure=payload.get("value", 400.0))
                 
                 elif msg_type == WSMessageType.SET_DEMAND_MULTIPLIER.value:
-                    value = payload.get("value", 1.0)
-                    result = app_state.run_simulation(demand_multiplier=value)
-                    await manager.broadcast_simulation_update(result)
+                    coalescer.submit(demand_multiplier=payload.get("value", 1.0))
                 
                 elif msg_type == WSMessageType.INJECT_LEAK.value:
                     count = payload.get("count", 1)
+                    # inject_leaks already re-runs the simulation with the new leaks and
+                    # keeps that response, warnings included, as the current state
                     leak_result = app_state.inject_leaks(count)
-                    await manager.broadcast({
-                        "type": WSMessageType.LEAK_ALERT.value,
-                        "payload": {"injected_node_ids": leak_result.injected_node_ids}
-                    })
-                    # Re-run simulation with new leaks
-                    result = app_state.run_simulation()
-                    await manager.broadcast_simulation_update(result)
+                    await manager.broadcast_simulation_update(
+                        app_state.get_current_simulation_state(),
+                        leak_result.injected_node_ids,
+                    )
                 
                 elif msg_type == WSMessageType.CLEAR_LEAKS.value:
                     app_state.clear_leaks()
@@ -340,13 +423,13 @@ async def websocket_endpoint(websocket: WebSocket):
                     })
                 
                 else:
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_text(dumps({
                         "type": WSMessageType.ERROR.value,
                         "payload": {"message": f"Unknown message type: {msg_type}"}
                     }))
                     
             except Exception as e:
-                await websocket.send_text(json.dumps({
+                await websocket.send_text(dumps({
                     "type": WSMessageType.ERROR.value,
                     "payload": {"message": str(e)}
                 }))
@@ -356,3 +439,5 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         print(f"WebSocket error: {e}")
         manager.disconnect(websocket)
+    finally:
+        coalescer.cancel()
@@ -6,7 +6,11 @@ Database models for the gas distribution network.
 
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Float, Integer, DateTime, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import (
+    String, Float, Integer, DateTime, ForeignKey, ForeignKeyConstraint, Index, Enum as SQLEnum,
+    DDL, column, event, func, table, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -25,7 +29,7 @@ class Node(Base):
     """Gas network node (consumption point)."""
     __tablename__ = "nodes"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     node_type: Mapped[str] = mapped_column(String(20), nullable=False)
     x: Mapped[float] = mapped_column(Float, nullable=False)  # Longitude
     y: Mapped[float] = mapped_column(Float, nullable=False)  # Latitude
@@ -33,18 +37,18 @@ class Node(Base):
     elevation: Mapped[float] = mapped_column(Float, default=0.0)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     
-    # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Timestamps (stamped by Postgres, so COPY and bulk paths get them too)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
 
-    # Relationships
+    # Relationships (lazy loads raise: load them explicitly with selectinload)
     outgoing_pipes: Mapped[list["Pipe"]] = relationship(
-        "Pipe", foreign_keys="Pipe.source_id", back_populates="source_node"
+        "Pipe", foreign_keys="Pipe.source_id", back_populates="source_node", lazy="raise_on_sql"
     )
     incoming_pipes: Mapped[list["Pipe"]] = relationship(
-        "Pipe", foreign_keys="Pipe.target_id", back_populates="target_node"
+        "Pipe", foreign_keys="Pipe.target_id", back_populates="target_node", lazy="raise_on_sql"
     )
-    leaks: Mapped[list["Leak"]] = relationship("Leak", back_populates="node")
+    leaks: Mapped[list["Leak"]] = relationship("Leak", back_populates="node", lazy="raise_on_sql")
 
     def to_dict(self) -> dict:
         return {
@@ -62,9 +66,9 @@ class Pipe(Base):
     """Gas distribution pipe."""
     __tablename__ = "pipes"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    source_id: Mapped[int] = mapped_column(Integer, ForeignKey("nodes.id"), nullable=False)
-    target_id: Mapped[int] = mapped_column(Integer, ForeignKey("nodes.id"), nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source_id: Mapped[int] = mapped_column(Integer, ForeignKey("nodes.id"), nullable=False, index=True)
+    target_id: Mapped[int] = mapped_column(Integer, ForeignKey("nodes.id"), nullable=False, index=True)
     length: Mapped[float] = mapped_column(Float, nullable=False)  # meters
     diameter: Mapped[float] = mapped_column(Float, nullable=False)  # meters
     roughness: Mapped[float] = mapped_column(Float, default=0.0001)
@@ -72,12 +76,16 @@ class Pipe(Base):
     year_installed: Mapped[int] = mapped_column(Integer, default=2000)
     
     # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
 
     # Relationships
-    source_node: Mapped["Node"] = relationship("Node", foreign_keys=[source_id], back_populates="outgoing_pipes")
-    target_node: Mapped["Node"] = relationship("Node", foreign_keys=[target_id], back_populates="incoming_pipes")
+    source_node: Mapped["Node"] = relationship(
+        "Node", foreign_keys=[source_id], back_populates="outgoing_pipes", lazy="raise_on_sql"
+    )
+    target_node: Mapped["Node"] = relationship(
+        "Node", foreign_keys=[target_id], back_populates="incoming_pipes", lazy="raise_on_sql"
+    )
 
     def to_dict(self) -> dict:
         return {
@@ -95,18 +103,21 @@ class Pipe(Base):
 class Leak(Base):
     """Active leak in the network."""
     __tablename__ = "leaks"
+    __table_args__ = (
+        Index("ix_leaks_active", "cleared_at", postgresql_where=text("cleared_at IS NULL")),
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     node_id: Mapped[int] = mapped_column(Integer, ForeignKey("nodes.id"), nullable=False)
     severity: Mapped[float] = mapped_column(Float, default=1.0)  # Leak rate multiplier
     detected: Mapped[bool] = mapped_column(default=False)
     
     # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     cleared_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     # Relationships
-    node: Mapped["Node"] = relationship("Node", back_populates="leaks")
+    node: Mapped["Node"] = relationship("Node", back_populates="leaks", lazy="raise_on_sql")
 
     @property
     def is_active(self) -> bool:
@@ -114,25 +125,161 @@ class Leak(Base):
 
 
 class SimulationSnapshot(Base):
-    """Cached simulation results for quick retrieval."""
+    """
+    Cached simulation results for quick retrieval.
+    
+    Range-partitioned by month on created_at, so writes only touch the newest
+    partition and old months can be dropped whole (see
+    crud.create_snapshot_partition / crud.drop_snapshot_partition). The
+    partition key has to be part of the primary key. The metric tables are
+    partitioned the same way on a copy of their snapshot's created_at.
+    """
     __tablename__ = "simulation_snapshots"
+    __table_args__ = (
+        Index(
+            "ix_snapshots_current_recent",
+            text("created_at DESC"),
+            postgresql_where=text("is_current"),
+        ),
+        Index("ix_simulation_snapshots_created_at", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     source_pressure: Mapped[float] = mapped_column(Float, nullable=False)
     demand_multiplier: Mapped[float] = mapped_column(Float, default=1.0)
     
-    # Store full simulation state as JSON
-    node_pressures: Mapped[dict] = mapped_column(JSON, default=dict)
-    pipe_flow_rates: Mapped[dict] = mapped_column(JSON, default=dict)
-    node_actual_demand: Mapped[dict] = mapped_column(JSON, default=dict)
-    pipe_velocities: Mapped[dict] = mapped_column(JSON, default=dict)
-    pipe_pressure_drops: Mapped[dict] = mapped_column(JSON, default=dict)
-    pipe_reynolds: Mapped[dict] = mapped_column(JSON, default=dict)
-    active_leaks: Mapped[dict] = mapped_column(JSON, default=dict)
-    warnings: Mapped[list] = mapped_column(JSON, default=list)
+    # Per-node / per-pipe results live in snapshot_node_metrics and
+    # snapshot_pipe_metrics; only the small payloads stay as JSONB
+    active_leaks: Mapped[dict] = mapped_column(JSONB, default=dict)
+    warnings: Mapped[list] = mapped_column(JSONB, default=list)
+
+    # Summaries extracted at write time, so filters don't scan the metrics
+    min_pressure: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    max_velocity: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    n_active_leaks: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     
-    # Timestamps
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Timestamps (partition key)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, server_default=func.now())
     
     # Flag for current/latest snapshot
     is_current: Mapped[bool] = mapped_column(default=False, index=True)
+
+    # Relationships (metrics are written with COPY, never through the ORM)
+    node_metrics: Mapped[list["SnapshotNodeMetric"]] = relationship(
+        "SnapshotNodeMetric", viewonly=True, lazy="raise_on_sql"
+    )
+    pipe_metrics: Mapped[list["SnapshotPipeMetric"]] = relationship(
+        "SnapshotPipeMetric", viewonly=True, lazy="raise_on_sql"
+    )
+
+
+class SnapshotNodeMetric(Base):
+    """Simulated state of one node in one snapshot."""
+    __tablename__ = "snapshot_node_metrics"
+    __table_args__ = (
+        # Snapshot ids only grow, so a BRIN index stays tiny
+        Index("ix_snapshot_node_metrics_snapshot_id", "snapshot_id", postgresql_using="brin"),
+        ForeignKeyConstraint(
+            ["snapshot_id", "created_at"],
+            ["simulation_snapshots.id", "simulation_snapshots.created_at"],
+            ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    snapshot_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    node_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    pressure: Mapped[float] = mapped_column(Float, nullable=False)  # kPa
+    actual_demand: Mapped[float] = mapped_column(Float, nullable=False)  # m³/h
+    
+    # The snapshot's created_at (partition key, same months as the snapshots)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+
+class SnapshotPipeMetric(Base):
+    """Simulated state of one pipe in one snapshot."""
+    __tablename__ = "snapshot_pipe_metrics"
+    __table_args__ = (
+        Index("ix_snapshot_pipe_metrics_snapshot_id", "snapshot_id", postgresql_using="brin"),
+        ForeignKeyConstraint(
+            ["snapshot_id", "created_at"],
+            ["simulation_snapshots.id", "simulation_snapshots.created_at"],
+            ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    snapshot_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    pipe_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    flow_rate: Mapped[float] = mapped_column(Float, nullable=False)  # m³/h
+    velocity: Mapped[float] = mapped_column(Float, nullable=False)  # m/s
+    pressure_drop: Mapped[float] = mapped_column(Float, nullable=False)  # kPa
+    reynolds: Mapped[float] = mapped_column(Float, nullable=False)
+    
+    # The snapshot's created_at (partition key, same months as the snapshots)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+
+# ============ MATERIALIZED VIEWS ============
+# The current snapshot's metrics, so dashboard reads don't join against
+# snapshot history. Refreshed CONCURRENTLY (hence the unique indexes) in the
+# background shortly after save_snapshot / clear_network, so they can lag
+# the current snapshot by about crud.VIEWS_REFRESH_DELAY.
+
+CURRENT_SNAPSHOT_NODES_SQL = """
+CREATE MATERIALIZED VIEW mv_current_snapshot_nodes AS
+SELECT m.node_id, m.pressure, m.actual_demand
+FROM snapshot_node_metrics m
+JOIN simulation_snapshots s ON s.id = m.snapshot_id AND s.created_at = m.created_at
+WHERE s.is_current
+"""
+
+CURRENT_SNAPSHOT_PIPES_SQL = """
+CREATE MATERIALIZED VIEW mv_current_snapshot_pipes AS
+SELECT m.pipe_id, m.flow_rate, m.velocity, m.pressure_drop, m.reynolds
+FROM snapshot_pipe_metrics m
+JOIN simulation_snapshots s ON s.id = m.snapshot_id AND s.created_at = m.created_at
+WHERE s.is_current
+"""
+
+CURRENT_SNAPSHOT_VIEWS = ("mv_current_snapshot_nodes", "mv_current_snapshot_pipes")
+
+# Lightweight handles for querying the views (not part of Base.metadata)
+mv_current_snapshot_nodes = table(
+    "mv_current_snapshot_nodes",
+    column("node_id", Integer),
+    column("pressure", Float),
+    column("actual_demand", Float),
+)
+mv_current_snapshot_pipes = table(
+    "mv_current_snapshot_pipes",
+    column("pipe_id", Integer),
+    column("flow_rate", Float),
+    column("velocity", Float),
+    column("pressure_drop", Float),
+    column("reynolds", Float),
+)
+
+# Keep init_db (create_all) in step with the Alembic migrations. Views are
+# attached to the metadata so they are created after every table they read.
+for _partitioned in (SimulationSnapshot, SnapshotNodeMetric, SnapshotPipeMetric):
+    _name = _partitioned.__tablename__
+    event.listen(
+        _partitioned.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE {_name}_default PARTITION OF {_name} DEFAULT"
+        ).execute_if(dialect="postgresql"),
+    )
+for _view_sql, _view, _key in (
+    (CURRENT_SNAPSHOT_NODES_SQL, "mv_current_snapshot_nodes", "node_id"),
+    (CURRENT_SNAPSHOT_PIPES_SQL, "mv_current_snapshot_pipes", "pipe_id"),
+):
+    for _ddl in (_view_sql, f"CREATE UNIQUE INDEX ix_{_view}_{_key} ON {_view} ({_key})"):
+        event.listen(Base.metadata, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
+    event.listen(
+        Base.metadata,
+        "before_drop",
+        DDL(f"DROP MATERIALIZED VIEW IF EXISTS {_view}").execute_if(dialect="postgresql"),
+    )
@@ -5,8 +5,9 @@ These models define the API contract between frontend and backend.
 They mirror the dataclasses in city_gen.py and physics.py.
 """
 
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Annotated, Dict, List, Literal, Optional
+from typing_extensions import TypedDict  # pydantic needs this TypedDict before 3.12
 from enum import Enum
 
 
@@ -33,32 +34,31 @@ class LeakDetectionStrategy(str, Enum):
 # Network Models
 # ============================================================================
 
-class NodeSchema(BaseModel):
+# Nodes and pipes are plain dicts (GasNode/GasPipe.to_dict()), so these are
+# TypedDicts: they document the shape without a model instance per item.
+
+class NodeSchema(TypedDict):
     """Gas network node (consumption point)."""
     id: int
     node_type: str
-    x: float = Field(..., description="Longitude or normalized X coordinate")
-    y: float = Field(..., description="Latitude or normalized Y coordinate")
-    base_demand: float = Field(..., description="Base gas demand in m³/hour")
-    elevation: float = Field(..., description="Elevation in meters")
+    x: Annotated[float, Field(description="Longitude or normalized X coordinate")]
+    y: Annotated[float, Field(description="Latitude or normalized Y coordinate")]
+    base_demand: Annotated[float, Field(description="Base gas demand in m³/hour")]
+    elevation: Annotated[float, Field(description="Elevation in meters")]
     name: str
 
-    model_config = {"from_attributes": True}  # Allows creating from dataclass
-
 
-class PipeSchema(BaseModel):
+class PipeSchema(TypedDict):
     """Gas distribution pipe."""
     id: int
     source_id: int
     target_id: int
-    length: float = Field(..., description="Pipe length in meters")
-    diameter: float = Field(..., description="Pipe diameter in meters")
-    roughness: float = Field(..., description="Pipe roughness for Darcy-Weisbach")
+    length: Annotated[float, Field(description="Pipe length in meters")]
+    diameter: Annotated[float, Field(description="Pipe diameter in meters")]
+    roughness: Annotated[float, Field(description="Pipe roughness for Darcy-Weisbach")]
     material: str
     year_installed: int
 
-    model_config = {"from_attributes": True}
-
 
 class NetworkResponse(BaseModel):
     """Complete network data response."""
@@ -106,6 +106,17 @@ class SimulationResponse(BaseModel):
     active_leaks: Dict[int, float] = Field(..., description="Active leaks: node_id -> leak_rate")
     warnings: List[str] = Field(default_factory=list, description="Simulation warnings")
 
+    # Serialization caches. A response is built once per simulation and then
+    # only read, so its dump / WebSocket message can be reused across clients.
+    _payload: Optional[dict] = PrivateAttr(default=None)
+    _message_json: Optional[str] = PrivateAttr(default=None)
+
+    def cached_dump(self) -> dict:
+        """model_dump(), computed once per response."""
+        if self._payload is None:
+            self._payload = self.model_dump()
+        return self._payload
+
 
 # ============================================================================
 # Leak Detection Models
@@ -113,8 +124,9 @@ class SimulationResponse(BaseModel):
 
 class LeakDetectionRequest(BaseModel):
     """Request to run leak detection."""
-    strategy: LeakDetectionStrategy = Field(
-        default=LeakDetectionStrategy.COMBINED,
+    # Literal rather than the enum: validated as a plain string lookup
+    strategy: Literal["pressure_drop", "flow_imbalance", "combined"] = Field(
+        default=LeakDetectionStrategy.COMBINED.value,
         description="Detection algorithm to use"
     )
     num_sensors: int = Field(
@@ -194,7 +206,18 @@ class WSMessageType(str, Enum):
 
 class WSMessage(BaseModel):
     """Base WebSocket message."""
-    type: WSMessageType
+    # Same values as WSMessageType, validated as plain strings
+    type: Literal[
+        "SET_PRESSURE",
+        "SET_DEMAND_MULTIPLIER",
+        "INJECT_LEAK",
+        "CLEAR_LEAKS",
+        "HIGHLIGHT_PIPE",
+        "SIMULATION_UPDATE",
+        "NETWORK_UPDATE",
+        "LEAK_ALERT",
+        "ERROR",
+    ]
     payload: dict = Field(default_factory=dict)
 
 
@@ -206,3 +229,28 @@ class HealthResponse(BaseModel):
     """API health check response."""
     status: str = "ok"
     version: str = "1.0.0"
+
+
+# ============================================================================
+# Schema Build
+# ============================================================================
+
+# Make sure every validator/serializer is complete at import time, so no
+# request ever pays for a deferred schema build.
+for _model in (
+    NetworkResponse,
+    GenerateNetworkRequest,
+    SimulationRequest,
+    SimulationResponse,
+    LeakDetectionRequest,
+    SuspectedLeak,
+    LeakDetectionResponse,
+    InjectLeaksRequest,
+    InjectLeaksResponse,
+    OptimalSensorRequest,
+    OptimalSensorResponse,
+    WSMessage,
+    HealthResponse,
+):
+    _model.model_rebuild()
+del _model
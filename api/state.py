@@ -9,23 +9,21 @@ and exposes them through a clean interface for the API.
 """
 
 import time
+from itertools import islice
 from typing import List, Optional, Dict
 from pathlib import Path
-import random
 import networkx as nx
+import numpy as np
+import orjson
 
 # Import existing modules (they stay unchanged!)
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
+# The repo root is put on sys.path once, in api/__init__.py
 from city_gen import CityNetworkGenerator, GasNode, GasPipe
 from physics import PhysicsEngine, SimulationState
 from leak_detector import LeakDetector
 
 from api.schemas import (
     NetworkResponse,
-    NodeSchema,
-    PipeSchema,
     SimulationResponse,
     LeakDetectionResponse,
     InjectLeaksResponse,
@@ -45,10 +43,33 @@ class AppState:
     # Path to network data file (legacy, will be replaced by PostgreSQL)
     DATA_PATH = Path(__file__).parent.parent / "data" / "network.json"
     
+    # Simulation responses carry at most this many warnings
+    MAX_WARNINGS = 10
+    
+    # PhysicsEngine.classify_pressures() levels that produce a warning
+    CRITICAL_STATUS = PhysicsEngine.PRESSURE_STATUSES.index("critical")
+    LOW_STATUS = PhysicsEngine.PRESSURE_STATUSES.index("low")
+    
+    # SimulationState dicts passed straight into every SimulationResponse
+    RESULT_FIELDS = (
+        "node_pressures",
+        "node_actual_demand",
+        "pipe_flow_rates",
+        "pipe_velocities",
+        "pipe_pressure_drops",
+        "pipe_reynolds",
+        "active_leaks",
+    )
+    
     def __init__(self):
         self.nodes: List[GasNode] = []
         self.pipes: List[GasPipe] = []
         self.graph = None
+        self._nodes_by_id: Dict[int, GasNode] = {}
+        self._eligible_leak_ids: List[int] = []
+        self._eligible_leak_id_set: frozenset = frozenset()
+        self._non_source_ids = np.empty(0, dtype=np.int64)
+        self._rng = np.random.default_rng()
         
         self.physics_engine = PhysicsEngine()
         self.leak_detector = LeakDetector()
@@ -56,10 +77,35 @@ class AppState:
         # Current simulation parameters (remembered between calls)
         self.current_source_pressure: float = 400.0
         self.current_demand_multiplier: float = 1.0
-        self.current_active_leaks: List[int] = []
+        # Active leaks are kept as a set; current_active_leaks derives the list
+        self._active_leaks_set: set[int] = set()
+        self._active_leaks_list: Optional[List[int]] = None
         
         # Cached simulation state
         self._simulation_state: Optional[SimulationState] = None
+        # Response built from _simulation_state, reset whenever it changes
+        self._current_response: Optional[SimulationResponse] = None
+        # _simulation_state's result dicts, shared (not copied) by its responses
+        self._result_dicts: Dict[str, dict] = {}
+        # Bumped on every simulation change; keys the serialized state below
+        self._sim_version: int = 0
+        self._sim_response_bytes: Optional[bytes] = None
+        self._sim_response_bytes_version: int = -1
+        
+        # Cached network payload, reset whenever nodes/pipes change
+        self._network_response_cache: Optional[NetworkResponse] = None
+    
+    @property
+    def current_active_leaks(self) -> List[int]:
+        """Active leak node ids, sorted; built from the set only when it changes."""
+        if self._active_leaks_list is None:
+            self._active_leaks_list = sorted(self._active_leaks_set)
+        return self._active_leaks_list
+    
+    @current_active_leaks.setter
+    def current_active_leaks(self, node_ids: List[int]) -> None:
+        self._active_leaks_set = set(node_ids)
+        self._active_leaks_list = None
     
     def load_network_if_exists(self) -> bool:
         """Load existing network from file if available."""
@@ -68,6 +114,7 @@ class AppState:
                 self.nodes, self.pipes, self.graph = CityNetworkGenerator.load_network(
                     str(self.DATA_PATH)
                 )
+                self._index_network()
                 print(f"✅ Loaded network: {len(self.nodes)} nodes, {len(self.pipes)} pipes")
                 # Run initial simulation
                 self._run_simulation_internal()
@@ -83,15 +130,30 @@ class AppState:
             # Generate default network if none exists
             return self.generate_network(50)
         
-        return NetworkResponse(
-            nodes=[NodeSchema.model_validate(n.to_dict()) for n in self.nodes],
-            pipes=[PipeSchema.model_validate(p.to_dict()) for p in self.pipes],
-        )
+        if self._network_response_cache is None:
+            self._network_response_cache = NetworkResponse.model_construct(
+                nodes=[n.to_dict() for n in self.nodes],
+                pipes=[p.to_dict() for p in self.pipes],
+            )
+        return self._network_response_cache
+    
+    def _index_network(self) -> None:
+        """Rebuild lookups derived from nodes/pipes; call after replacing the network."""
+        self._nodes_by_id = {n.id: n for n in self.nodes}
+        self._eligible_leak_ids = [n.id for n in self.nodes if n.node_type != "source"]
+        self._eligible_leak_id_set = frozenset(self._eligible_leak_ids)
+        self._non_source_ids = np.array(self._eligible_leak_ids, dtype=np.int64)
+        self._invalidate_network_cache()
+    
+    def _invalidate_network_cache(self) -> None:
+        """Drop the cached network payload; call after any change to nodes/pipes."""
+        self._network_response_cache = None
     
     def generate_network(self, node_count: int) -> NetworkResponse:
         """Generate a new network with the specified number of nodes."""
         generator = CityNetworkGenerator()
         self.nodes, self.pipes, self.graph = generator.generate_network(n_nodes=node_count)
+        self._index_network()
         
         # Save to file (legacy persistence)
         self.DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -100,14 +162,12 @@ class AppState:
         # Reset simulation state
         self.current_active_leaks = []
         self._simulation_state = None
+        self._invalidate_simulation_cache()
         self._run_simulation_internal()
         
         print(f"✅ Generated network: {len(self.nodes)} nodes, {len(self.pipes)} pipes")
         
-        return NetworkResponse(
-            nodes=[NodeSchema.model_validate(n.to_dict()) for n in self.nodes],
-            pipes=[PipeSchema.model_validate(p.to_dict()) for p in self.pipes],
-        )
+        return self.get_network()
     
     def run_simulation(
         self,
@@ -138,7 +198,7 @@ class AppState:
         """Internal simulation runner."""
         if not self.nodes or not self.pipes:
             # Return empty state if no network
-            return SimulationResponse(
+            return SimulationResponse.model_construct(
                 node_pressures={},
                 node_actual_demand={},
                 pipe_flow_rates={},
@@ -150,9 +210,10 @@ class AppState:
             )
         
         # Prepare leak rates dict
-        leak_rates = {node_id: 50.0 for node_id in self.current_active_leaks}
+        leak_rates = dict.fromkeys(self.current_active_leaks, 50.0)
         
         # Run simulation
+        self._invalidate_simulation_cache()
         self._simulation_state = self.physics_engine.simulate_network(
             graph=self.graph,
             nodes=self.nodes,
@@ -161,41 +222,65 @@ class AppState:
             demand_multiplier=self.current_demand_multiplier,
         )
         
-        # Collect warnings
-        warnings = []
-        for node_id, pressure in self._simulation_state.node_pressures.items():
-            status = self.physics_engine.get_pressure_status(pressure)
-            if status in ("critical", "low"):
-                node = next((n for n in self.nodes if n.id == node_id), None)
-                if node:
-                    warnings.append(f"{status.title()} pressure at {node.name}: {pressure:.1f} kPa")
-        
-        return SimulationResponse(
-            node_pressures={str(k): v for k, v in self._simulation_state.node_pressures.items()},
-            node_actual_demand={str(k): v for k, v in self._simulation_state.node_actual_demand.items()},
-            pipe_flow_rates={str(k): v for k, v in self._simulation_state.pipe_flow_rates.items()},
-            pipe_velocities={str(k): v for k, v in self._simulation_state.pipe_velocities.items()},
-            pipe_pressure_drops={str(k): v for k, v in self._simulation_state.pipe_pressure_drops.items()},
-            pipe_reynolds={str(k): v for k, v in self._simulation_state.pipe_reynolds.items()},
-            active_leaks={str(k): v for k, v in self._simulation_state.active_leaks.items()},
-            warnings=warnings[:10],  # Limit to 10 warnings
+        # int keys are stringified by the JSON encoder, no per-request copies needed
+        self._result_dicts = {
+            name: getattr(self._simulation_state, name) for name in self.RESULT_FIELDS
+        }
+        warnings = self._collect_warnings()
+        
+        # Kept as the current response so later broadcasts keep the warnings
+        self._current_response = SimulationResponse.model_construct(
+            **self._result_dicts,
+            warnings=warnings[:self.MAX_WARNINGS],
         )
+        return self._current_response
+    
+    def _collect_warnings(self) -> List[str]:
+        """Low/critical pressure warnings, stopping after MAX_WARNINGS."""
+        node_ids = self._simulation_state.node_ids
+        pressures = self._simulation_state.node_pressures_arr
+        
+        # Classify all nodes at once; only the flagged ones are formatted
+        statuses = self.physics_engine.classify_pressures(pressures)
+        critical = statuses == self.CRITICAL_STATUS
+        low = statuses == self.LOW_STATUS
+        
+        warnings = (
+            f"{'Critical' if critical[i] else 'Low'} pressure at {node.name}: {pressures[i]:.1f} kPa"
+            for i in np.flatnonzero(low | critical).tolist()
+            if (node := self._nodes_by_id.get(int(node_ids[i])))
+        )
+        # islice stops the generator, so nothing past the cap is formatted
+        return list(islice(warnings, self.MAX_WARNINGS))
     
     def get_current_simulation_state(self) -> SimulationResponse:
         """Get current simulation state without re-running."""
         if self._simulation_state is None:
             return self.run_simulation()
         
-        return SimulationResponse(
-            node_pressures={str(k): v for k, v in self._simulation_state.node_pressures.items()},
-            node_actual_demand={str(k): v for k, v in self._simulation_state.node_actual_demand.items()},
-            pipe_flow_rates={str(k): v for k, v in self._simulation_state.pipe_flow_rates.items()},
-            pipe_velocities={str(k): v for k, v in self._simulation_state.pipe_velocities.items()},
-            pipe_pressure_drops={str(k): v for k, v in self._simulation_state.pipe_pressure_drops.items()},
-            pipe_reynolds={str(k): v for k, v in self._simulation_state.pipe_reynolds.items()},
-            active_leaks={str(k): v for k, v in self._simulation_state.active_leaks.items()},
-            warnings=[],
-        )
+        if self._current_response is None:
+            self._current_response = self._build_current_response()
+        return self._current_response
+    
+    def _build_current_response(self) -> SimulationResponse:
+        """Build the response for the cached simulation state."""
+        return SimulationResponse.model_construct(**self._result_dicts, warnings=[])
+    
+    def get_current_simulation_json(self) -> bytes:
+        """get_current_simulation_state() as JSON, serialized once per simulation."""
+        state = self.get_current_simulation_state()
+        if self._sim_response_bytes_version != self._sim_version:
+            self._sim_response_bytes = orjson.dumps(
+                state.cached_dump(),
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+            self._sim_response_bytes_version = self._sim_version
+        return self._sim_response_bytes
+    
+    def _invalidate_simulation_cache(self) -> None:
+        """Drop cached simulation responses; call whenever _simulation_state changes."""
+        self._current_response = None
+        self._sim_version += 1
     
     def detect_leaks(self, strategy: str, num_sensors: int = 5, sensor_node_ids: list[int] | None = None) -> LeakDetectionResponse:
         """Run leak detection with the specified strategy.
@@ -207,7 +292,7 @@ class AppState:
         start_time = time.time()
         
         # Determine actual sensor placements FIRST
-        valid_ids = {n.id for n in self.nodes if n.node_type != 'source'}
+        valid_ids = self._eligible_leak_id_set
         
         # Check if sensor_node_ids was explicitly provided (even if empty list)
         if sensor_node_ids is not None:
@@ -271,7 +356,7 @@ class AppState:
             # Only include if visible to at least one sensor
             if node_id in visible_nodes:
                 detected_node_ids.append(node_id)
-                suspected.append(SuspectedLeak(
+                suspected.append(SuspectedLeak.model_construct(
                     node_id=node_id,
                     confidence=leak['confidence'],
                     reason=leak.get('reason', f"Severity: {leak.get('estimated_severity', 'Unknown')}"),
@@ -280,7 +365,7 @@ class AppState:
                 ))
         
         # Calculate detection rate: how many actual leaks were detected
-        actual_leaks = set(self.current_active_leaks)
+        actual_leaks = self._active_leaks_set
         detected_set = set(detected_node_ids)
         true_positives = len(actual_leaks & detected_set)
         false_positives = len(detected_set - actual_leaks)
@@ -288,7 +373,7 @@ class AppState:
         detection_rate = true_positives / len(actual_leaks) if actual_leaks else 0.0
         false_positive_rate = false_positives / len(detected_set) if detected_set else 0.0
         
-        return LeakDetectionResponse(
+        return LeakDetectionResponse.model_construct(
             suspected_leaks=suspected,
             detected_leaks=detected_node_ids,
             sensor_placements=sensor_placements,
@@ -300,26 +385,22 @@ class AppState:
     
     def inject_leaks(self, count: int, node_ids: list[int] | None = None) -> InjectLeaksResponse:
         """Inject leaks into nodes. Replaces existing leaks (not additive)."""
-        # Get eligible nodes (non-source)
-        eligible = [n for n in self.nodes if n.node_type != "source"]
-        
-        if not eligible:
+        if not self._eligible_leak_ids:
             return InjectLeaksResponse(injected_node_ids=[])
         
-        # Clear existing leaks first (makes injection idempotent/replaceable)
-        self.current_active_leaks = []
-        
         if node_ids:
             # Use specific node IDs if provided
-            eligible_ids = {n.id for n in eligible}
-            selected_ids = [nid for nid in node_ids if nid in eligible_ids]
+            selected_ids = [nid for nid in node_ids if nid in self._eligible_leak_id_set]
         else:
-            # Select random nodes
-            count = min(count, len(eligible))
-            selected = random.sample(eligible, count)
-            selected_ids = [n.id for n in selected]
-        
-        # Set active leaks
+            # Select random nodes (sample indices, not GasNode objects)
+            count = min(count, self._non_source_ids.size)
+            idxs = self._rng.choice(self._non_source_ids.size, count, replace=False)
+            selected_ids = self._non_source_ids[idxs].tolist()
+        
+        # Replace (not extend) the active leaks
+        if set(selected_ids) == self._active_leaks_set and self._simulation_state is not None:
+            # Same leaks as last time - the cached simulation still applies
+            return InjectLeaksResponse(injected_node_ids=selected_ids)
         self.current_active_leaks = selected_ids
         
         # Re-run simulation so active_leaks state is updated
@@ -334,6 +415,8 @@ class AppState:
         self.current_active_leaks = []
         if self._simulation_state:
             self._simulation_state.active_leaks = {}
+            self._result_dicts["active_leaks"] = {}
+            self._invalidate_simulation_cache()
 
     def get_optimal_sensor_placements(self, num_sensors: int) -> OptimalSensorResponse:
         """
@@ -360,8 +443,7 @@ class AppState:
             )
         
         # Get eligible nodes (non-source nodes)
-        eligible_nodes = [n for n in self.nodes if n.node_type != "source"]
-        eligible_ids = {n.id for n in eligible_nodes}
+        eligible_ids = self._eligible_leak_id_set
         
         if not eligible_ids:
             return OptimalSensorResponse(
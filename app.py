@@ -18,7 +18,7 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 import networkx as nx
-import json
+import orjson
 from datetime import datetime
 from pathlib import Path
 import io
@@ -37,178 +37,47 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: #1E3A5F;
-        margin-bottom: 0;
-    }
-    .sub-header {
-        font-size: 1.1rem;
-        color: #666;
-        margin-top: 0;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-    }
-    .status-optimal { color: #00C853; font-weight: bold; }
-    .status-normal { color: #2196F3; font-weight: bold; }
-    .status-warning { color: #FF9800; font-weight: bold; }
-    .status-critical { color: #F44336; font-weight: bold; }
-    
-    /* Leak Detection Cards - Professional Design */
-    .leak-card {
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-        border-radius: 12px;
-        padding: 1rem 1.25rem;
-        margin: 0.75rem 0;
-        border-left: 4px solid #e94560;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    .leak-card-header {
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        margin-bottom: 0.5rem;
-    }
-    .leak-card-title {
-        color: #ffffff;
-        font-size: 1.1rem;
-        font-weight: 600;
-        margin: 0;
-    }
-    .leak-card-subtitle {
-        color: #a0a0a0;
-        font-size: 0.85rem;
-        margin: 0;
-    }
-    .leak-card-badges {
-        display: flex;
-        gap: 0.5rem;
-        margin-top: 0.75rem;
-        flex-wrap: wrap;
-    }
-    .badge {
-        padding: 0.25rem 0.75rem;
-        border-radius: 20px;
-        font-size: 0.75rem;
-        font-weight: 600;
-        text-transform: uppercase;
-    }
-    .badge-type {
-        background-color: #0f3460;
-        color: #94a3b8;
-    }
-    .badge-confidence {
-        background-color: #065f46;
-        color: #6ee7b7;
-    }
-    .badge-severity-critical {
-        background-color: #7f1d1d;
-        color: #fca5a5;
-    }
-    .badge-severity-severe {
-        background-color: #78350f;
-        color: #fcd34d;
-    }
-    .badge-severity-moderate {
-        background-color: #1e3a5f;
-        color: #93c5fd;
-    }
-    .badge-severity-minor {
-        background-color: #14532d;
-        color: #86efac;
-    }
-    
-    /* Alert Header */
-    .alert-header {
-        background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-        color: white;
-        padding: 1rem 1.5rem;
-        border-radius: 12px;
-        margin-bottom: 1rem;
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);
-    }
-    .alert-header-icon {
-        font-size: 1.5rem;
-    }
-    .alert-header-text {
-        font-size: 1.25rem;
-        font-weight: 700;
-    }
-    
-    /* Success Alert */
-    .success-alert {
-        background: linear-gradient(135deg, #059669 0%, #047857 100%);
-        color: white;
-        padding: 1rem 1.5rem;
-        border-radius: 12px;
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        box-shadow: 0 4px 12px rgba(5, 150, 105, 0.3);
-    }
-    
-    /* Recommendations */
-    .recommendation-card {
-        background-color: #f8fafc;
-        border: 1px solid #e2e8f0;
-        border-radius: 8px;
-        padding: 0.75rem 1rem;
-        margin: 0.5rem 0;
-        font-size: 0.9rem;
-        color: #334155;
-    }
-    
-    .stButton>button {
-        width: 100%;
-    }
-    
-    /* Sidebar button text - smaller to fit on one line */
-    [data-testid="stSidebar"] .stButton>button {
-        font-size: 0.8rem;
-        padding: 0.4rem 0.5rem;
-        white-space: nowrap;
-        overflow: hidden;
-        text-overflow: ellipsis;
-    }
-    
-    /* Darker dividers in sidebar for clearer section separation */
-    [data-testid="stSidebar"] hr {
-        border-color: #4a5568;
-        border-width: 2px;
-        margin: 1rem 0;
-    }
-    
-    /* Legend items - white text for dark theme visibility */
-    .legend-item {
-        color: #ffffff !important;
-        font-size: 0.9rem;
-        font-weight: 500;
-    }
-    
-    /* Reduce top padding in sidebar */
-    [data-testid="stSidebar"] > div:first-child {
-        padding-top: 1rem;
-    }
-    [data-testid="stSidebar"] [data-testid="stVerticalBlock"] {
-        gap: 0.5rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+CSS_PATH = Path(__file__).parent / "assets" / "app.css"
+
+
+@st.cache_resource
+def load_css() -> str:
+    """Page CSS, read from disk once per server process."""
+    return f"<style>\n{CSS_PATH.read_text()}</style>"
+
+
+# Streamlit drops elements that a rerun doesn't emit, so the (cached) style
+# tag still has to be written on every run
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Constants
 DATA_PATH = Path(__file__).parent / "data" / "network_data.json"
 DEFAULT_NODES = 200
 
+# Pipe colors by normalized pressure: a pipe above PIPE_PRESSURE_BINS[i-1]
+# (and not above the next bin) gets PIPE_COLORS[i]
+PIPE_PRESSURE_BINS = np.array([0.1, 0.3, 0.5, 0.7])
+PIPE_COLORS = [
+    '#d32f2f',  # Red - critical
+    '#f57c00',  # Orange - warning
+    '#fbc02d',  # Yellow - low
+    '#4caf50',  # Green - normal
+    '#1976d2',  # Blue - optimal
+]
+
+# Plotly client config for every chart: no mode bar, no resize handler
+# (Streamlit sizes the container), scroll to zoom
+PLOTLY_CONFIG = {'displayModeBar': False, 'scrollZoom': True, 'responsive': False}
+# Above this many pipes the map is drawn as a static image
+STATIC_MAP_PIPES = 2000
+
+# Values that are only bucketed or charted (not exported) are kept in float32:
+# half the memory, and Plotly ships numpy arrays to the browser as typed arrays
+VIS_DTYPE = np.float32
+
+# Consumer marker colors: leak, below 30% / above 50% of source pressure, in between
+CONSUMER_COLORS = np.array(['#d32f2f', '#f57c00', '#4caf50', '#fbc02d'])
+
 
 def initialize_session_state():
     """Initialize all session state variables."""
@@ -220,6 +89,8 @@ def initialize_session_state():
         st.session_state.pipes = None
     if 'graph' not in st.session_state:
         st.session_state.graph = None
+    if 'node_by_id' not in st.session_state:
+        st.session_state.node_by_id = None
     if 'simulation_state' not in st.session_state:
         st.session_state.simulation_state = None
     if 'active_leaks' not in st.session_state:
@@ -230,17 +101,93 @@ def initialize_session_state():
         st.session_state.physics_engine = PhysicsEngine()
     if 'demand_multiplier' not in st.session_state:
         st.session_state.demand_multiplier = 1.0
+    if 'figure_cache' not in st.session_state:
+        st.session_state.figure_cache = {}
+
+
+def store_network(nodes, pipes, graph):
+    """Put a network into session state along with its lookups."""
+    st.session_state.nodes = nodes
+    st.session_state.pipes = pipes
+    st.session_state.graph = graph
+    st.session_state.node_by_id = {n.id: n for n in nodes}
+    
+    # Node attributes as arrays (structure of arrays), in `nodes` order
+    n_nodes = len(nodes)
+    st.session_state.node_ids = np.fromiter((n.id for n in nodes), dtype=np.int64, count=n_nodes)
+    st.session_state.node_xs = np.fromiter((n.x for n in nodes), dtype=float, count=n_nodes)
+    st.session_state.node_ys = np.fromiter((n.y for n in nodes), dtype=float, count=n_nodes)
+    st.session_state.center_lon = float(st.session_state.node_xs.mean())
+    st.session_state.center_lat = float(st.session_state.node_ys.mean())
+    st.session_state.node_types = np.array([n.node_type for n in nodes], dtype=object)
+    st.session_state.source_mask = st.session_state.node_types == "source"
+    st.session_state.consumer_mask = ~st.session_state.source_mask
+    st.session_state.source_nodes = [n for n in nodes if n.node_type == "source"]
+    st.session_state.consumer_nodes = [n for n in nodes if n.node_type != "source"]
+    st.session_state.node_frame = pd.DataFrame([n.to_dict() for n in nodes])
+    
+    # Static leading part of each map hover label; renders only append results
+    st.session_state.consumer_hover_prefix = [
+        f"<b>{n.name}</b><br>"
+        f"Type: {n.node_type.title()}<br>"
+        f"Node ID: {n.id}<br>"
+        for n in st.session_state.consumer_nodes
+    ]
+    st.session_state.source_hover_prefix = [
+        f"<b>{n.name}</b><br>"
+        f"Type: Supply Source<br>"
+        for n in st.session_state.source_nodes
+    ]
+    st.session_state.pipe_hover_prefix = [
+        f"Pipe #{p.id}<br>" for p in pipes
+    ]
+    consumer_types = st.session_state.node_types[st.session_state.consumer_mask]
+    st.session_state.consumer_sizes = np.select(
+        [consumer_types == "industrial", consumer_types == "commercial"], [12, 10], default=8
+    )
+    
+    # Pipe endpoints as positions in `nodes`, and line widths (half-pixel buckets)
+    node_index = {n.id: i for i, n in enumerate(nodes)}
+    st.session_state.pipe_source_idx = np.array([node_index[p.source_id] for p in pipes], dtype=np.intp)
+    st.session_state.pipe_target_idx = np.array([node_index[p.target_id] for p in pipes], dtype=np.intp)
+    st.session_state.pipe_ids = np.array([p.id for p in pipes], dtype=np.int64)
+    st.session_state.pipe_diameters = np.array([p.diameter for p in pipes], dtype=float)
+    st.session_state.pipe_widths = np.round(
+        np.maximum(1.0, st.session_state.pipe_diameters * 10) * 2
+    ) / 2
+    st.session_state.pipe_frame = pd.DataFrame([p.to_dict() for p in pipes])
+    
+    st.session_state.network_loaded = True
+
+
+@st.cache_resource(max_entries=4)
+def load_saved_network(path: str, mtime: float):
+    """
+    Parse a saved network once per (path, mtime), shared by all sessions.
+    
+    The returned nodes, pipes and graph are shared objects: treat them as read-only.
+    """
+    return CityNetworkGenerator.load_network(path)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def generate_network_cached(n_nodes: int, seed: int):
+    """
+    Generate a network once per (n_nodes, seed).
+    
+    Only nodes and pipes are cached (the graph is rebuilt with build_graph);
+    each call returns a fresh copy.
+    """
+    nodes, pipes, _ = CityNetworkGenerator(seed=seed).generate_network(n_nodes=n_nodes)
+    return nodes, pipes
 
 
 def load_or_generate_network(force_regenerate: bool = False, n_nodes: int = DEFAULT_NODES):
     """Load existing network or generate new one."""
     if not force_regenerate and DATA_PATH.exists():
         try:
-            nodes, pipes, graph = CityNetworkGenerator.load_network(str(DATA_PATH))
-            st.session_state.nodes = nodes
-            st.session_state.pipes = pipes
-            st.session_state.graph = graph
-            st.session_state.network_loaded = True
+            nodes, pipes, graph = load_saved_network(str(DATA_PATH), DATA_PATH.stat().st_mtime)
+            store_network(nodes, pipes, graph)
             return True
         except Exception as e:
             st.warning(f"Could not load existing network: {e}")
@@ -248,36 +195,90 @@ def load_or_generate_network(force_regenerate: bool = False, n_nodes: int = DEFA
     # Generate new network
     with st.spinner("🏗️ Generating new city network..."):
         seed = int(datetime.now().timestamp()) if force_regenerate else 42
-        generator = CityNetworkGenerator(seed=seed)
-        nodes, pipes, graph = generator.generate_network(n_nodes=n_nodes)
-        generator.save_network(nodes, pipes, str(DATA_PATH))
+        nodes, pipes = generate_network_cached(n_nodes, seed)
+        graph = CityNetworkGenerator.build_graph(nodes, pipes)
+        CityNetworkGenerator(seed=seed).save_network(nodes, pipes, str(DATA_PATH))
         
-        st.session_state.nodes = nodes
-        st.session_state.pipes = pipes
-        st.session_state.graph = graph
-        st.session_state.network_loaded = True
+        store_network(nodes, pipes, graph)
         st.session_state.active_leaks = {}
         st.session_state.detection_result = None
         
     return True
 
 
+def node_values(values: dict) -> np.ndarray:
+    """Per-node simulation values as an array in `nodes` order (0 where missing)."""
+    node_ids = st.session_state.node_ids
+    return np.fromiter(
+        (values.get(node_id, 0) for node_id in node_ids.tolist()), dtype=float, count=node_ids.size
+    )
+
+
+def pipe_values(values: dict) -> np.ndarray:
+    """Per-pipe simulation values as an array in `pipes` order (0 where missing)."""
+    pipe_ids = st.session_state.pipe_ids
+    return np.fromiter(
+        (values.get(pipe_id, 0) for pipe_id in pipe_ids.tolist()), dtype=float, count=pipe_ids.size
+    )
+
+
+def node_pressures(state: SimulationState) -> np.ndarray:
+    """state.node_pressures as an array in `nodes` order."""
+    # simulate_network already keeps the pressures as an array in node order
+    if np.array_equal(state.node_ids, st.session_state.node_ids):
+        return state.node_pressures_arr
+    return node_values(state.node_pressures)
+
+
+def pressure_statuses(pressures: np.ndarray) -> list:
+    """get_pressure_status() for every pressure, classified in one vectorized pass."""
+    engine = st.session_state.physics_engine
+    return np.array(engine.PRESSURE_STATUSES)[engine.classify_pressures(pressures)].tolist()
+
+
 def run_simulation():
     """Run the physics simulation with current state."""
     if not st.session_state.network_loaded:
         return None
     
-    state = st.session_state.physics_engine.simulate_network(
-        st.session_state.graph,
-        st.session_state.nodes,
-        st.session_state.pipes,
-        leaks=st.session_state.active_leaks,
-        demand_multiplier=st.session_state.demand_multiplier
+    # Reuse the last result if none of the simulation inputs changed
+    inputs = (
+        st.session_state.physics_engine.source_pressure,
+        st.session_state.demand_multiplier,
+        frozenset(st.session_state.active_leaks.items()),
     )
+    cached = st.session_state.get('simulation_cache')
+    if cached is not None and cached[0] is st.session_state.nodes and cached[1] == inputs:
+        state = cached[2]
+    else:
+        state = st.session_state.physics_engine.simulate_network(
+            st.session_state.graph,
+            st.session_state.nodes,
+            st.session_state.pipes,
+            leaks=st.session_state.active_leaks,
+            demand_multiplier=st.session_state.demand_multiplier
+        )
+        st.session_state.simulation_cache = (st.session_state.nodes, inputs, state)
+    
     st.session_state.simulation_state = state
     return state
 
 
+def get_cached_figure(builder, state: SimulationState) -> go.Figure:
+    """
+    Return builder(state), reusing the last figure while its inputs are unchanged.
+    
+    Simulation states and detection results are replaced (never mutated) when
+    they change, so comparing them by identity is enough.
+    """
+    inputs = (state, st.session_state.detection_result)
+    cache = st.session_state.figure_cache
+    cached = cache.get(builder.__name__)
+    if cached is None or any(old is not new for old, new in zip(cached[0], inputs)):
+        cached = cache[builder.__name__] = (inputs, builder(state))
+    return cached[1]
+
+
 def create_network_visualization(state: SimulationState) -> go.Figure:
     """Create interactive Plotly visualization of the network."""
     nodes = st.session_state.nodes
@@ -297,85 +298,89 @@ def create_network_visualization(state: SimulationState) -> go.Figure:
         [1.0, '#1976d2']     # Optimal - Blue
     ]
     
-    # Draw pipes (edges)
-    edge_traces = []
-    
-    for pipe in pipes:
-        source_node = next(n for n in nodes if n.id == pipe.source_id)
-        target_node = next(n for n in nodes if n.id == pipe.target_id)
-        
-        # Get pressures at endpoints
-        p1 = state.node_pressures.get(pipe.source_id, 0)
-        p2 = state.node_pressures.get(pipe.target_id, 0)
-        avg_pressure = (p1 + p2) / 2
-        
-        # Normalize pressure for color
-        norm_pressure = min(avg_pressure / engine.source_pressure, 1.0)
-        
-        # Color based on pressure
-        if norm_pressure > 0.7:
-            color = '#1976d2'  # Blue - optimal
-        elif norm_pressure > 0.5:
-            color = '#4caf50'  # Green - normal
-        elif norm_pressure > 0.3:
-            color = '#fbc02d'  # Yellow - low
-        elif norm_pressure > 0.1:
-            color = '#f57c00'  # Orange - warning
-        else:
-            color = '#d32f2f'  # Red - critical
-        
-        # Line width based on pipe diameter
-        width = max(1, pipe.diameter * 10)
+    # Pipe colors from the average pressure at both ends, for all pipes at once
+    source_idx = st.session_state.pipe_source_idx
+    target_idx = st.session_state.pipe_target_idx
+    pressures = node_pressures(state)
+    vis_pressures = pressures.astype(VIS_DTYPE)
+    avg_pressure = VIS_DTYPE(0.5) * (vis_pressures[source_idx] + vis_pressures[target_idx])
+    norm_pressure = np.minimum(avg_pressure / VIS_DTYPE(engine.source_pressure), VIS_DTYPE(1.0))
+    color_idx = np.searchsorted(PIPE_PRESSURE_BINS, norm_pressure)
+    
+    # Draw pipes (edges), batched into one trace per (color, width) bucket;
+    # a None point breaks the line between consecutive pipes
+    pipe_buckets = {}
+    
+    for pipe, prefix, s_i, t_i, c_i, width in zip(
+        pipes, st.session_state.pipe_hover_prefix, source_idx.tolist(), target_idx.tolist(),
+        color_idx.tolist(), st.session_state.pipe_widths.tolist()
+    ):
+        source_node = nodes[s_i]
+        target_node = nodes[t_i]
+        color = PIPE_COLORS[c_i]
         
         # Flow rate for hover
         flow = state.pipe_flow_rates.get(pipe.id, 0)
+        hover = (f"{prefix}"
+                 f"Flow: {abs(flow):.1f} m³/h<br>"
+                 f"Diameter: {pipe.diameter*1000:.0f}mm<br>"
+                 f"Material: {pipe.material}<br>"
+                 f"Pressure Drop: {state.pipe_pressure_drops.get(pipe.id, 0):.1f} kPa")
         
+        lons, lats, hovers = pipe_buckets.setdefault((color, width), ([], [], []))
+        lons += [source_node.x, target_node.x, None]
+        lats += [source_node.y, target_node.y, None]
+        hovers += [hover, hover, None]
+    
+    for (color, width), (lons, lats, hovers) in pipe_buckets.items():
         fig.add_trace(go.Scattermap(
             mode='lines',
-            lon=[source_node.x, target_node.x],
-            lat=[source_node.y, target_node.y],
+            lon=lons,
+            lat=lats,
             line=dict(color=color, width=width),
             hoverinfo='text',
-            hovertext=f"Pipe #{pipe.id}<br>"
-                     f"Flow: {abs(flow):.1f} m³/h<br>"
-                     f"Diameter: {pipe.diameter*1000:.0f}mm<br>"
-                     f"Material: {pipe.material}<br>"
-                     f"Pressure Drop: {state.pipe_pressure_drops.get(pipe.id, 0):.1f} kPa",
+            hovertext=hovers,
             showlegend=False
         ))
     
     # Separate nodes by type for different markers
-    source_nodes = [n for n in nodes if n.node_type == "source"]
-    consumer_nodes = [n for n in nodes if n.node_type != "source"]
+    node_xs = st.session_state.node_xs
+    node_ys = st.session_state.node_ys
+    source_mask = st.session_state.source_mask
+    consumer_mask = st.session_state.consumer_mask
+    source_nodes = st.session_state.source_nodes
     leak_node_ids = set(state.active_leaks.keys())
     
-    # Consumer nodes
-    consumer_lons = [n.x for n in consumer_nodes]
-    consumer_lats = [n.y for n in consumer_nodes]
-    consumer_pressures = [state.node_pressures.get(n.id, 0) for n in consumer_nodes]
-    consumer_colors = [
-        '#d32f2f' if n.id in leak_node_ids else 
-        ('#f57c00' if state.node_pressures.get(n.id, 0) < engine.source_pressure * 0.3 else
-         '#4caf50' if state.node_pressures.get(n.id, 0) > engine.source_pressure * 0.5 else
-         '#fbc02d')
-        for n in consumer_nodes
-    ]
-    consumer_sizes = [
-        15 if n.id in leak_node_ids else
-        (12 if n.node_type == "industrial" else 
-         10 if n.node_type == "commercial" else 8)
-        for n in consumer_nodes
-    ]
+    # Consumer nodes, colored and sized for all consumers at once
+    consumer_lons = node_xs[consumer_mask]
+    consumer_lats = node_ys[consumer_mask]
+    consumer_pressures = pressures[consumer_mask]
+    consumer_demands = node_values(state.node_actual_demand)[consumer_mask]
+    consumer_leaks = np.isin(st.session_state.node_ids[consumer_mask], list(leak_node_ids))
+    vis_consumer_pressures = vis_pressures[consumer_mask]
+    consumer_color_idx = np.select(
+        [
+            consumer_leaks,
+            vis_consumer_pressures < VIS_DTYPE(engine.source_pressure * 0.3),
+            vis_consumer_pressures > VIS_DTYPE(engine.source_pressure * 0.5),
+        ],
+        [0, 1, 2],
+        default=3,
+    )
+    consumer_colors = CONSUMER_COLORS[consumer_color_idx].tolist()
+    consumer_sizes = np.where(consumer_leaks, 15, st.session_state.consumer_sizes)
     
     consumer_hover = [
-        f"<b>{n.name}</b><br>"
-        f"Type: {n.node_type.title()}<br>"
-        f"Node ID: {n.id}<br>"
-        f"Pressure: {state.node_pressures.get(n.id, 0):.1f} kPa<br>"
-        f"Demand: {state.node_actual_demand.get(n.id, 0):.1f} m³/h<br>"
-        f"Status: {engine.get_pressure_status(state.node_pressures.get(n.id, 0)).title()}"
-        + (f"<br><b>⚠️ LEAK ACTIVE</b>" if n.id in leak_node_ids else "")
-        for n in consumer_nodes
+        f"{prefix}"
+        f"Pressure: {pressure:.1f} kPa<br>"
+        f"Demand: {demand:.1f} m³/h<br>"
+        f"Status: {status.title()}"
+        + ("<br><b>⚠️ LEAK ACTIVE</b>" if has_leak else "")
+        for prefix, pressure, demand, status, has_leak in zip(
+            st.session_state.consumer_hover_prefix, consumer_pressures.tolist(),
+            consumer_demands.tolist(), pressure_statuses(consumer_pressures),
+            consumer_leaks.tolist()
+        )
     ]
     
     fig.add_trace(go.Scattermap(
@@ -394,14 +399,15 @@ def create_network_visualization(state: SimulationState) -> go.Figure:
     
     # Source nodes (larger, distinct marker)
     if source_nodes:
-        source_lons = [n.x for n in source_nodes]
-        source_lats = [n.y for n in source_nodes]
+        source_lons = node_xs[source_mask]
+        source_lats = node_ys[source_mask]
         source_hover = [
-            f"<b>{n.name}</b><br>"
-            f"Type: Supply Source<br>"
-            f"Pressure: {state.node_pressures.get(n.id, 0):.1f} kPa<br>"
+            f"{prefix}"
+            f"Pressure: {pressure:.1f} kPa<br>"
             f"Status: Active"
-            for n in source_nodes
+            for prefix, pressure in zip(
+                st.session_state.source_hover_prefix, pressures[source_mask].tolist()
+            )
         ]
         
         fig.add_trace(go.Scattermap(
@@ -422,14 +428,17 @@ def create_network_visualization(state: SimulationState) -> go.Figure:
     # Highlight detected leaks if analysis was run
     if st.session_state.detection_result and st.session_state.detection_result.detected_leaks:
         detected_ids = [l['node_id'] for l in st.session_state.detection_result.detected_leaks]
-        detected_nodes = [n for n in nodes if n.id in detected_ids]
+        detected_mask = np.isin(st.session_state.node_ids, detected_ids)
         
-        if detected_nodes:
+        if detected_mask.any():
+            detected_lons = node_xs[detected_mask]
+            detected_lats = node_ys[detected_mask]
+            
             # Use a larger marker with distinct color for detected leaks
             fig.add_trace(go.Scattermap(
                 mode='markers',
-                lon=[n.x for n in detected_nodes],
-                lat=[n.y for n in detected_nodes],
+                lon=detected_lons,
+                lat=detected_lats,
                 marker=dict(
                     size=30,
                     color='#ff1744',
@@ -437,15 +446,18 @@ def create_network_visualization(state: SimulationState) -> go.Figure:
                     opacity=0.7
                 ),
                 hoverinfo='text',
-                hovertext=[f"🚨 Detected Leak at Node #{n.id}" for n in detected_nodes],
+                hovertext=[
+                    f"🚨 Detected Leak at Node #{node_id}"
+                    for node_id in st.session_state.node_ids[detected_mask].tolist()
+                ],
                 name='Detected Leaks'
             ))
             
             # Add a second smaller marker for emphasis (pulsing effect simulation)
             fig.add_trace(go.Scattermap(
                 mode='markers',
-                lon=[n.x for n in detected_nodes],
-                lat=[n.y for n in detected_nodes],
+                lon=detected_lons,
+                lat=detected_lats,
                 marker=dict(
                     size=15,
                     color='#ffffff',
@@ -457,15 +469,13 @@ def create_network_visualization(state: SimulationState) -> go.Figure:
             ))
     
     # Layout
-    center_lon = np.mean([n.x for n in nodes])
-    center_lat = np.mean([n.y for n in nodes])
-    
     fig.update_layout(
         map=dict(
             style="carto-positron",
-            center=dict(lon=center_lon, lat=center_lat),
+            center=dict(lon=st.session_state.center_lon, lat=st.session_state.center_lat),
             zoom=12
         ),
+        uirevision='constant',  # keep pan/zoom across reruns
         margin=dict(l=0, r=0, t=0, b=0),
         height=600,
         showlegend=True,
@@ -485,14 +495,9 @@ def create_network_visualization(state: SimulationState) -> go.Figure:
 def create_pressure_histogram(state: SimulationState) -> go.Figure:
     """Create histogram of node pressures."""
     engine = st.session_state.physics_engine
-    nodes = st.session_state.nodes
     
     # Exclude source nodes
-    pressures = [
-        state.node_pressures.get(n.id, 0)
-        for n in nodes
-        if n.node_type != "source"
-    ]
+    pressures = node_pressures(state)[st.session_state.consumer_mask].astype(VIS_DTYPE)
     
     fig = go.Figure()
     
@@ -533,21 +538,22 @@ def create_pressure_histogram(state: SimulationState) -> go.Figure:
 def create_flow_chart(state: SimulationState) -> go.Figure:
     """Create bar chart of top flow rates."""
     pipes = st.session_state.pipes
+    flows = np.abs(pipe_values(state.pipe_flow_rates)).astype(VIS_DTYPE)
     
-    # Get top 20 pipes by flow rate
-    flow_data = [
-        (p.id, abs(state.pipe_flow_rates.get(p.id, 0)), p.diameter)
-        for p in pipes
-    ]
-    flow_data.sort(key=lambda x: x[1], reverse=True)
-    top_flows = flow_data[:20]
+    # Get top 20 pipes by flow rate: partial selection, then sort only those
+    # (ties keep pipe order, like a stable sort)
+    if len(pipes) > 20:
+        top = np.argpartition(-flows, 20)[:20]
+    else:
+        top = np.arange(len(pipes))
+    top = top[np.lexsort((top, -flows[top]))]
     
     fig = go.Figure()
     
     fig.add_trace(go.Bar(
-        x=[f"Pipe {f[0]}" for f in top_flows],
-        y=[f[1] for f in top_flows],
-        marker_color=[f[2] * 1000 for f in top_flows],
+        x=[f"Pipe {pipe_id}" for pipe_id in st.session_state.pipe_ids[top].tolist()],
+        y=flows[top],
+        marker_color=(st.session_state.pipe_diameters[top] * 1000).astype(VIS_DTYPE),
         marker_colorscale='Blues',
         hovertemplate="Pipe ID: %{x}<br>Flow: %{y:.1f} m³/h<extra></extra>"
     ))
@@ -574,6 +580,22 @@ def export_simulation_data() -> bytes:
     # Calculate metrics
     metrics = engine.calculate_system_metrics(state, nodes, pipes)
     
+    # Static node/pipe columns come from the per-network frames; the simulation
+    # results are added as whole columns
+    pressures = node_pressures(state)
+    nodes_df = st.session_state.node_frame.assign(
+        current_pressure_kpa=pressures,
+        current_demand_m3h=node_values(state.node_actual_demand),
+        status=pressure_statuses(pressures),
+        has_leak=np.isin(st.session_state.node_ids, list(state.active_leaks)),
+    )
+    pipes_df = st.session_state.pipe_frame.assign(
+        current_flow_m3h=pipe_values(state.pipe_flow_rates),
+        current_velocity_ms=pipe_values(state.pipe_velocities),
+        pressure_drop_kpa=pipe_values(state.pipe_pressure_drops),
+        reynolds_number=pipe_values(state.pipe_reynolds),
+    )
+    
     export_data = {
         "metadata": {
             "export_time": datetime.now().isoformat(),
@@ -586,26 +608,8 @@ def export_simulation_data() -> bytes:
             "demand_multiplier": st.session_state.demand_multiplier
         },
         "metrics": metrics,
-        "nodes": [
-            {
-                **n.to_dict(),
-                "current_pressure_kpa": state.node_pressures.get(n.id, 0),
-                "current_demand_m3h": state.node_actual_demand.get(n.id, 0),
-                "status": engine.get_pressure_status(state.node_pressures.get(n.id, 0)),
-                "has_leak": n.id in state.active_leaks
-            }
-            for n in nodes
-        ],
-        "pipes": [
-            {
-                **p.to_dict(),
-                "current_flow_m3h": state.pipe_flow_rates.get(p.id, 0),
-                "current_velocity_ms": state.pipe_velocities.get(p.id, 0),
-                "pressure_drop_kpa": state.pipe_pressure_drops.get(p.id, 0),
-                "reynolds_number": state.pipe_reynolds.get(p.id, 0)
-            }
-            for p in pipes
-        ],
+        "nodes": nodes_df.to_dict(orient='records'),
+        "pipes": pipes_df.to_dict(orient='records'),
         "active_leaks": [
             {
                 "node_id": node_id,
@@ -625,13 +629,40 @@ def export_simulation_data() -> bytes:
             "recommendations": result.recommendations
         }
     
-    return json.dumps(export_data, indent=2).encode('utf-8')
+    return orjson.dumps(
+        export_data,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+def leak_card_html(leak: dict) -> str:
+    """Render one detected leak as a leak-card HTML block."""
+    severity_class = f"badge-severity-{leak['estimated_severity'].lower()}"
+    return f"""
+    <div class="leak-card">
+        <div class="leak-card-header">
+            <span style="color: #e94560; font-size: 1.2rem;">⚠️</span>
+            <p class="leak-card-title">{leak['node_name']} (Node #{leak['node_id']})</p>
+        </div>
+        <div class="leak-card-badges">
+            <span class="badge badge-type">{leak['node_type']}</span>
+            <span class="badge badge-confidence">{leak['confidence']:.0%} confidence</span>
+            <span class="badge {severity_class}">{leak['estimated_severity']}</span>
+        </div>
+    </div>
+    """
 
 
 def main():
     """Main application entry point."""
     initialize_session_state()
     
+    # First visit: load and simulate before anything is drawn, so the header and
+    # sidebar render complete in this same run instead of after a rerun
+    if not st.session_state.network_loaded:
+        load_or_generate_network()
+        run_simulation()
+    
     # Header
     col_title, col_export = st.columns([4, 1])
     with col_title:
@@ -643,14 +674,19 @@ def main():
     with col_export:
         st.write("")  # Spacing
         if st.session_state.simulation_state:
-            export_data = export_simulation_data()
-            st.download_button(
-                label="Export Data",
-                data=export_data,
-                file_name=f"gas_sim_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json",
-                use_container_width=True
-            )
+            # Built on request only, and kept while it matches the current results
+            export_inputs = (st.session_state.simulation_state, st.session_state.detection_result)
+            if st.button("Prepare Export", use_container_width=True, help="Build a JSON export of the current simulation"):
+                st.session_state.export_blob = (export_inputs, export_simulation_data())
+            export = st.session_state.get('export_blob')
+            if export is not None and all(a is b for a, b in zip(export[0], export_inputs)):
+                st.download_button(
+                    label="Export Data",
+                    data=export[1],
+                    file_name=f"gas_sim_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
     
     # Sidebar controls
     with st.sidebar:
@@ -726,11 +762,9 @@ def main():
         
         if st.session_state.network_loaded:
             # Node selection for manual leak
-            consumer_nodes = [
-                n for n in st.session_state.nodes 
-                if n.node_type != "source"
-            ]
-            node_options = {f"#{n.id} - {n.name}": n.id for n in consumer_nodes}
+            node_options = {
+                f"#{n.id} - {n.name}": n.id for n in st.session_state.consumer_nodes
+            }
             
             selected_node = st.selectbox(
                 "Select Node for Leak",
@@ -777,18 +811,13 @@ def main():
             
             # Show active leaks
             if st.session_state.active_leaks:
-                st.write("**Active Leaks:**")
-                for node_id, rate in st.session_state.active_leaks.items():
-                    node = next(n for n in st.session_state.nodes if n.id == node_id)
-                    st.write(f"• Node #{node_id}: {rate:.0f} m³/h")
+                st.markdown("  \n".join([
+                    "**Active Leaks:**",
+                    *(f"• Node #{node_id}: {rate:.0f} m³/h"
+                      for node_id, rate in st.session_state.active_leaks.items())
+                ]))
     
     # Main content area
-    if not st.session_state.network_loaded:
-        st.info("👆 Click 'Load Previous' or 'Generate New' in the sidebar to start.")
-        load_or_generate_network()
-        run_simulation()
-        st.rerun()
-    
     # Run simulation if needed
     if st.session_state.simulation_state is None:
         run_simulation()
@@ -856,34 +885,19 @@ def main():
             # Recommendations section (before leak cards)
             if result.recommendations:
                 st.subheader("Recommended Actions")
-                for rec in result.recommendations:
-                    st.markdown(f"""
-                    <div class="recommendation-card">
-                        {rec}
-                    </div>
-                    """, unsafe_allow_html=True)
+                st.markdown("".join(
+                    f'<div class="recommendation-card">{rec}</div>'
+                    for rec in result.recommendations
+                ), unsafe_allow_html=True)
                 st.markdown("---")
-            
-            # Leak cards in columns for better layout
+
+            # Leak cards in columns for better layout, alternating as before but
+            # with one markdown element per column
             cols = st.columns(2)
-            for idx, leak in enumerate(result.detected_leaks):
-                severity = leak['estimated_severity'].lower()
-                severity_class = f"badge-severity-{severity}"
-                
-                with cols[idx % 2]:
-                    st.markdown(f"""
-                    <div class="leak-card">
-                        <div class="leak-card-header">
-                            <span style="color: #e94560; font-size: 1.2rem;">⚠️</span>
-                            <p class="leak-card-title">{leak['node_name']} (Node #{leak['node_id']})</p>
-                        </div>
-                        <div class="leak-card-badges">
-                            <span class="badge badge-type">{leak['node_type']}</span>
-                            <span class="badge badge-confidence">{leak['confidence']:.0%} confidence</span>
-                            <span class="badge {severity_class}">{leak['estimated_severity']}</span>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            for col, leaks in zip(cols, (result.detected_leaks[0::2], result.detected_leaks[1::2])):
+                if leaks:
+                    with col:
+                        st.markdown("".join(map(leak_card_html, leaks)), unsafe_allow_html=True)
         else:
             st.markdown("""
             <div class="success-alert">
@@ -909,32 +923,39 @@ def main():
         st.markdown('<span class="legend-item">🔴 <strong>Critical</strong> (<10%)</span>', unsafe_allow_html=True)
     
     # Map
-    fig = create_network_visualization(state)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = get_cached_figure(create_network_visualization, state)
+    map_config = PLOTLY_CONFIG
+    if len(st.session_state.pipes) > STATIC_MAP_PIPES:
+        map_config = {**PLOTLY_CONFIG, 'staticPlot': True}
+    st.plotly_chart(fig, use_container_width=True, theme=None, config=map_config)
     
     # Charts row
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_hist = create_pressure_histogram(state)
-        st.plotly_chart(fig_hist, use_container_width=True)
+        fig_hist = get_cached_figure(create_pressure_histogram, state)
+        st.plotly_chart(fig_hist, use_container_width=True, theme=None, config=PLOTLY_CONFIG)
     
     with col2:
-        fig_flow = create_flow_chart(state)
-        st.plotly_chart(fig_flow, use_container_width=True)
+        fig_flow = get_cached_figure(create_flow_chart, state)
+        st.plotly_chart(fig_flow, use_container_width=True, theme=None, config=PLOTLY_CONFIG)
     
     # Node details table
     with st.expander("📋 Node Details"):
         node_data = []
-        for node in st.session_state.nodes:
-            pressure = state.node_pressures.get(node.id, 0)
-            status = engine.get_pressure_status(pressure)
+        pressures = node_pressures(state)
+        for node, pressure, demand, status in zip(
+            st.session_state.nodes,
+            pressures.tolist(),
+            node_values(state.node_actual_demand).tolist(),
+            pressure_statuses(pressures),
+        ):
             node_data.append({
                 "ID": node.id,
                 "Name": node.name,
                 "Type": node.node_type.title(),
                 "Pressure (kPa)": round(pressure, 1),
-                "Demand (m³/h)": round(state.node_actual_demand.get(node.id, 0), 1),
+                "Demand (m³/h)": round(demand, 1),
                 "Status": status.title(),
                 "Has Leak": "⚠️ Yes" if node.id in state.active_leaks else "No"
             })
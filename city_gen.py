@@ -10,11 +10,10 @@ by implementing a custom CoordinateProvider.
 
 import numpy as np
 import networkx as nx
-import json
-from dataclasses import dataclass, asdict
+import orjson
+from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional, Protocol
 from enum import Enum
-import random
 from pathlib import Path
 
 
@@ -26,7 +25,7 @@ class NodeType(Enum):
     SOURCE = "source"  # High-pressure supply point
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GasNode:
     """Represents a gas consumption point in the network."""
     id: int
@@ -38,10 +37,18 @@ class GasNode:
     name: str
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "id": self.id,
+            "node_type": self.node_type,
+            "x": self.x,
+            "y": self.y,
+            "base_demand": self.base_demand,
+            "elevation": self.elevation,
+            "name": self.name,
+        }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GasPipe:
     """Represents a gas distribution pipe."""
     id: int
@@ -54,7 +61,95 @@ class GasPipe:
     year_installed: int
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "id": self.id,
+            "source_id": self.source_id,
+            "target_id": self.target_id,
+            "length": self.length,
+            "diameter": self.diameter,
+            "roughness": self.roughness,
+            "material": self.material,
+            "year_installed": self.year_installed,
+        }
+
+
+class _UnionFind:
+    """Disjoint-set forest over node indices (path halving, union by size)."""
+    
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.count = n  # number of disjoint sets
+    
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(self, i: int, j: int) -> bool:
+        """Merge the sets holding i and j; False if they were already one set."""
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return False
+        if self.size[ri] < self.size[rj]:
+            ri, rj = rj, ri
+        self.parent[rj] = ri
+        self.size[ri] += self.size[rj]
+        self.count -= 1
+        return True
+    
+    def labels(self) -> np.ndarray:
+        """Root of every element's set."""
+        return np.array([self.find(i) for i in range(len(self.parent))])
+
+
+def _distance_matrix(xy: np.ndarray) -> np.ndarray:
+    """Euclidean distances between all rows of an (N, 2) coordinate array."""
+    return np.hypot(xy[:, None, 0] - xy[None, :, 0], xy[:, None, 1] - xy[None, :, 1])
+
+
+def _pairs_within(dist: np.ndarray, radius: float, block: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All pairs (i < j) with dist[i, j] <= radius, in (i, j) order.
+    
+    Scans blocks of rows against the columns from the block's first row on,
+    so only the upper triangle (plus the diagonal blocks) is compared and the
+    temporaries stay at block x N.
+    """
+    src_parts = [np.empty(0, dtype=np.intp)]
+    tgt_parts = [np.empty(0, dtype=np.intp)]
+    for start in range(0, len(dist), block):
+        rows, cols = np.nonzero(dist[start:start + block, start:] <= radius)
+        rows += start
+        cols += start
+        upper = cols > rows
+        src_parts.append(rows[upper])
+        tgt_parts.append(cols[upper])
+    return np.concatenate(src_parts), np.concatenate(tgt_parts)
+
+
+def _proximity_edges(
+    dist: np.ndarray,
+    radius: float,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Random geometric graph edges from a distance matrix.
+    
+    Every pair (i < j) within `radius` is connected with probability
+    1 - sqrt(d / radius); the trials are drawn in one batch, in (i, j) order.
+    
+    Returns:
+        (source indices, target indices, distances) of the accepted pairs
+    """
+    src_idx, tgt_idx = _pairs_within(dist, radius)
+    pair_dist = dist[src_idx, tgt_idx]
+    
+    # Probability of connection decreases with distance
+    accept = rng.random(len(pair_dist)) < 1.0 - np.sqrt(pair_dist / radius)
+    return src_idx[accept], tgt_idx[accept], pair_dist[accept]
 
 
 class CoordinateProvider(Protocol):
@@ -95,33 +190,20 @@ class ProceduralCoordinateProvider:
         Generate points with clustered distribution to simulate
         neighborhoods and commercial districts.
         """
-        points = []
-        
         # Create cluster centers (neighborhoods)
         n_clusters = max(3, n // 50)
-        cluster_centers = [
-            (
-                self.rng.normal(self.center[0], self.spread * 0.6),
-                self.rng.normal(self.center[1], self.spread * 0.6)
-            )
-            for _ in range(n_clusters)
-        ]
+        cluster_centers = self.rng.normal(self.center, self.spread * 0.6, size=(n_clusters, 2))
         
-        # Generate points around clusters
-        for i in range(n):
-            cluster = cluster_centers[i % n_clusters]
-            # Add grid-like offset to simulate streets
-            grid_noise = 0.002
-            x = cluster[0] + self.rng.normal(0, self.spread * 0.3)
-            y = cluster[1] + self.rng.normal(0, self.spread * 0.3)
-            
-            # Snap to pseudo-grid
-            x = round(x / grid_noise) * grid_noise + self.rng.normal(0, grid_noise * 0.1)
-            y = round(y / grid_noise) * grid_noise + self.rng.normal(0, grid_noise * 0.1)
-            
-            points.append((x, y))
+        # Points around clusters, round-robin; each point draws an (x, y)
+        # offset and an (x, y) grid jitter
+        draws = self.rng.standard_normal((n, 4))
+        xy = cluster_centers[np.arange(n) % n_clusters] + draws[:, :2] * (self.spread * 0.3)
+        
+        # Snap to pseudo-grid to simulate streets
+        grid_noise = 0.002
+        xy = np.round(xy / grid_noise) * grid_noise + draws[:, 2:] * (grid_noise * 0.1)
         
-        return points
+        return list(map(tuple, xy.tolist()))
 
 
 class RealCoordinateProvider:
@@ -163,6 +245,20 @@ class CityNetworkGenerator:
         "polyethylene": 0.000007,
         "pvc": 0.000005
     }
+    MATERIAL_CODES = {material: code for code, material in enumerate(PIPE_MATERIALS)}
+    
+    # Pipes are installed in [FIRST_INSTALL_YEAR, CURRENT_YEAR), and older pipes
+    # have higher roughness: 1% per year of age. Aged roughness by
+    # (material code, year - FIRST_INSTALL_YEAR)
+    FIRST_INSTALL_YEAR = 1970
+    CURRENT_YEAR = 2024
+    AGED_ROUGHNESS = np.array([
+        [round(roughness, 7) for roughness in row]
+        for row in (
+            np.array(list(PIPE_MATERIALS.values()))[:, None]
+            * (1 + (CURRENT_YEAR - np.arange(FIRST_INSTALL_YEAR, CURRENT_YEAR)) * 0.01)
+        ).tolist()
+    ])
     
     # Typical demands by node type (m³/hour)
     DEMAND_RANGES = {
@@ -178,6 +274,42 @@ class CityNetworkGenerator:
         NodeType.COMMERCIAL: 0.20,
         NodeType.INDUSTRIAL: 0.10
     }
+    # The same distribution as parallel types / cumulative probabilities
+    CONSUMER_TYPES = tuple(TYPE_DISTRIBUTION)
+    TYPE_CUMULATIVE = np.cumsum(list(TYPE_DISTRIBUTION.values()))
+    
+    # Street / business names by consumer node type
+    NODE_NAMES = {
+        NodeType.RESIDENTIAL: (
+            "Oak Street", "Maple Drive", "Cedar Lane", "Pine Court",
+            "Elm Avenue", "Walnut Way", "Birch Road", "Willow Place",
+            "Cherry Hill", "Hickory Lane", "Spruce Street", "Ash Drive"
+        ),
+        NodeType.COMMERCIAL: (
+            "Walmart Store", "Sam's Club", "Downtown Plaza", "Market Square",
+            "Business Center", "Shopping Center", "Retail Park", "Commerce Way",
+            "Trade Center", "Service Station", "Office Complex", "Medical Center"
+        ),
+        NodeType.INDUSTRIAL: (
+            "Distribution Center", "Warehouse Complex", "Manufacturing Plant",
+            "Processing Facility", "Industrial Park", "Logistics Hub",
+            "Factory Site", "Production Center"
+        ),
+    }
+    
+    # Node types by integer code, as used in the array views of a network.
+    # Lower codes get larger pipes: a pipe is sized by the lower code of its ends
+    TYPE_ORDER = (NodeType.SOURCE, NodeType.INDUSTRIAL, NodeType.COMMERCIAL, NodeType.RESIDENTIAL)
+    
+    # Pipe tiers by type code: (min diameter, max diameter, materials).
+    # Larger pipes for source/industrial/commercial connections
+    PIPE_TIERS = (
+        (0.3, 0.5, ("steel",)),  # Main supply lines
+        (0.15, 0.3, ("steel", "ductile_iron")),
+        (0.1, 0.2, ("steel", "ductile_iron", "polyethylene")),
+        (0.05, 0.1, ("polyethylene", "pvc")),
+    )
+    TIER_DIAMETERS = np.array([tier[:2] for tier in PIPE_TIERS])
     
     def __init__(
         self,
@@ -187,7 +319,6 @@ class CityNetworkGenerator:
         self.coord_provider = coordinate_provider or ProceduralCoordinateProvider(seed=seed)
         self.seed = seed
         self.rng = np.random.default_rng(seed)
-        random.seed(seed)
     
     def generate_network(
         self,
@@ -211,8 +342,17 @@ class CityNetworkGenerator:
         # Generate coordinates
         coords = self.coord_provider.generate_points(n_nodes + n_sources)
         
-        # Create graph using Random Geometric Graph approach
-        G = nx.Graph()
+        # Structure-of-arrays view of the nodes, used by the pipe computations
+        self._xy = np.asarray(coords, dtype=float)
+        self._type_codes = np.empty(len(coords), dtype=np.int8)
+        
+        # Weighted random selection of consumer node types, and the draws
+        # picking their names, all at once
+        n_consumers = max(len(coords) - n_sources, 0)
+        type_idx = np.searchsorted(
+            self.TYPE_CUMULATIVE, self.rng.random(n_consumers)
+        ).clip(max=len(self.CONSUMER_TYPES) - 1)
+        name_draws = self.rng.random(n_consumers).tolist()
         
         # Add nodes
         nodes = []
@@ -221,17 +361,8 @@ class CityNetworkGenerator:
                 node_type = NodeType.SOURCE
                 name = f"Supply Station {i + 1}"
             else:
-                # Weighted random selection of node type
-                rand_val = self.rng.random()
-                cumulative = 0
-                node_type = NodeType.RESIDENTIAL
-                for ntype, prob in self.TYPE_DISTRIBUTION.items():
-                    cumulative += prob
-                    if rand_val <= cumulative:
-                        node_type = ntype
-                        break
-                
-                name = self._generate_node_name(node_type, i)
+                node_type = self.CONSUMER_TYPES[type_idx[i - n_sources]]
+                name = self._generate_node_name(node_type, i, name_draws[i - n_sources])
             
             # Generate demand based on type
             demand_range = self.DEMAND_RANGES[node_type]
@@ -250,180 +381,175 @@ class CityNetworkGenerator:
                 name=name
             )
             nodes.append(node)
-            G.add_node(i, **node.to_dict())
+            self._type_codes[i] = self.TYPE_ORDER.index(node_type)
         
-        # Create edges using proximity
-        pipes = []
-        pipe_id = 0
+        # Create edges using proximity (Random Geometric Graph approach)
+        dist = _distance_matrix(self._xy)
+        src_idx, tgt_idx, pair_dist = _proximity_edges(dist, connection_radius, self.rng)
         
-        for i in range(len(nodes)):
-            for j in range(i + 1, len(nodes)):
-                dist = self._calculate_distance(nodes[i], nodes[j])
-                
-                # Connect if within radius
-                if dist <= connection_radius:
-                    # Probability of connection decreases with distance
-                    prob = 1.0 - (dist / connection_radius) ** 0.5
-                    if self.rng.random() < prob:
-                        pipe = self._create_pipe(pipe_id, nodes[i], nodes[j], dist)
-                        pipes.append(pipe)
-                        G.add_edge(i, j, **pipe.to_dict())
-                        pipe_id += 1
+        pipes = self._create_pipes(0, src_idx.tolist(), tgt_idx.tolist(), pair_dist.tolist())
+        pipe_id = len(pipes)
         
         # Ensure connectivity
         if ensure_connected:
-            pipes, pipe_id = self._ensure_connectivity(G, nodes, pipes, pipe_id)
+            pipes, pipe_id = self._ensure_connectivity(nodes, pipes, pipe_id, dist)
         
         # Ensure sources are well-connected
-        pipes, pipe_id = self._connect_sources(G, nodes, pipes, pipe_id, n_sources)
+        pipes, pipe_id = self._connect_sources(nodes, pipes, pipe_id, n_sources, dist)
         
-        return nodes, pipes, G
-    
-    def _calculate_distance(self, node1: GasNode, node2: GasNode) -> float:
-        """Calculate Euclidean distance between nodes."""
-        return np.sqrt((node1.x - node2.x)**2 + (node1.y - node2.y)**2)
+        # The topology is settled, so the graph is built once at the end
+        return nodes, pipes, self.build_graph(nodes, pipes)
     
-    def _create_pipe(
+    def _create_pipes(
         self,
-        pipe_id: int,
-        source: GasNode,
-        target: GasNode,
-        coord_distance: float
-    ) -> GasPipe:
-        """Create a pipe between two nodes with realistic properties."""
-        # Convert coordinate distance to meters (rough approximation)
-        length = coord_distance * 111000  # ~111km per degree
-        
-        # Determine pipe characteristics based on node types
-        source_type = source.node_type
-        target_type = target.node_type
+        first_id: int,
+        source_ids: List[int],
+        target_ids: List[int],
+        coord_distances: List[float]
+    ) -> List[GasPipe]:
+        """
+        Create pipes with realistic properties for a batch of node pairs,
+        numbered from first_id.
         
-        # Larger pipes for industrial/commercial connections
-        if source_type == "source" or target_type == "source":
-            diameter = self.rng.uniform(0.3, 0.5)  # Main supply lines
-            material = "steel"
-        elif source_type == "industrial" or target_type == "industrial":
-            diameter = self.rng.uniform(0.15, 0.3)
-            material = random.choice(["steel", "ductile_iron"])
-        elif source_type == "commercial" or target_type == "commercial":
-            diameter = self.rng.uniform(0.1, 0.2)
-            material = random.choice(["steel", "ductile_iron", "polyethylene"])
-        else:
-            diameter = self.rng.uniform(0.05, 0.1)
-            material = random.choice(["polyethylene", "pvc"])
+        The random properties of the whole batch are drawn up front, and the
+        numeric columns are computed (and rounded) as arrays.
+        """
+        n = len(source_ids)
+        u_diameter = self.rng.random(n)
+        u_material = self.rng.random(n).tolist()
+        years = self.rng.integers(self.FIRST_INSTALL_YEAR, self.CURRENT_YEAR, size=n)
         
-        roughness = self.PIPE_MATERIALS[material]
-        year = int(self.rng.integers(1970, 2024))
+        # Determine pipe characteristics based on node types
+        tiers = np.minimum(
+            self._type_codes[np.asarray(source_ids, dtype=np.intp)],
+            self._type_codes[np.asarray(target_ids, dtype=np.intp)]
+        )
+        min_diameter, max_diameter = self.TIER_DIAMETERS[tiers].T
+        diameters = np.round(min_diameter + (max_diameter - min_diameter) * u_diameter, 3)
         
-        # Older pipes have higher roughness
-        age_factor = 1 + (2024 - year) * 0.01
-        roughness *= age_factor
+        # Convert coordinate distance to meters (rough approximation)
+        lengths = np.round(np.asarray(coord_distances, dtype=float) * 111000, 1)  # ~111km per degree
         
-        return GasPipe(
-            id=pipe_id,
-            source_id=source.id,
-            target_id=target.id,
-            length=round(length, 1),
-            diameter=round(diameter, 3),
-            roughness=round(roughness, 7),
-            material=material,
-            year_installed=year
+        materials = []
+        for tier, u in zip(tiers.tolist(), u_material):
+            options = self.PIPE_TIERS[tier][2]
+            materials.append(options[int(u * len(options))])
+        material_codes = np.fromiter(
+            map(self.MATERIAL_CODES.__getitem__, materials), dtype=np.intp, count=n
         )
+        roughness = self.AGED_ROUGHNESS[material_codes, years - self.FIRST_INSTALL_YEAR]
+        
+        return [
+            GasPipe(
+                id=first_id + k,
+                source_id=source_ids[k],
+                target_id=target_ids[k],
+                length=length,
+                diameter=diameter,
+                roughness=rough,
+                material=materials[k],
+                year_installed=year
+            )
+            for k, (length, diameter, rough, year) in enumerate(zip(
+                lengths.tolist(), diameters.tolist(), roughness.tolist(), years.tolist()
+            ))
+        ]
     
     def _ensure_connectivity(
         self,
-        G: nx.Graph,
         nodes: List[GasNode],
         pipes: List[GasPipe],
-        pipe_id: int
+        pipe_id: int,
+        dist: np.ndarray
     ) -> Tuple[List[GasPipe], int]:
-        """Ensure the graph is fully connected."""
-        components = list(nx.connected_components(G))
+        """
+        Ensure the graph is fully connected.
         
-        while len(components) > 1:
-            # Connect two closest components
-            min_dist = float('inf')
-            best_pair = None
-            
-            for i, comp1 in enumerate(components):
-                for comp2 in components[i + 1:]:
-                    for n1 in comp1:
-                        for n2 in comp2:
-                            dist = self._calculate_distance(nodes[n1], nodes[n2])
-                            if dist < min_dist:
-                                min_dist = dist
-                                best_pair = (n1, n2)
-            
-            if best_pair:
-                n1, n2 = best_pair
-                pipe = self._create_pipe(pipe_id, nodes[n1], nodes[n2], min_dist)
-                pipes.append(pipe)
-                G.add_edge(n1, n2, **pipe.to_dict())
-                pipe_id += 1
-            
-            components = list(nx.connected_components(G))
+        Kruskal over the current components: pairs from different components
+        are taken shortest first and each one that still joins two components
+        gets a pipe, i.e. the two closest components are bridged each time.
+        """
+        components = _UnionFind(len(nodes))
+        for pipe in pipes:
+            components.union(pipe.source_id, pipe.target_id)
+        if components.count == 1:
+            return pipes, pipe_id
         
-        return pipes, pipe_id
+        labels = components.labels()
+        src_idx, tgt_idx = np.triu_indices(len(nodes), k=1)
+        between = labels[src_idx] != labels[tgt_idx]
+        src_idx, tgt_idx = src_idx[between], tgt_idx[between]
+        pair_dist = dist[src_idx, tgt_idx]
+        order = np.argsort(pair_dist, kind='stable')
+        
+        # Lowest node index in each component, by root: a bridge runs from
+        # the component with the lowest index to the other one
+        lowest = {}
+        for i, root in enumerate(labels.tolist()):
+            lowest.setdefault(root, i)
+        
+        bridges = []
+        for n1, n2, d in zip(
+            src_idx[order].tolist(), tgt_idx[order].tolist(), pair_dist[order].tolist()
+        ):
+            r1, r2 = components.find(n1), components.find(n2)
+            if r1 == r2:
+                continue
+            if lowest[r2] < lowest[r1]:
+                n1, n2 = n2, n1
+            components.union(n1, n2)
+            lowest[components.find(n1)] = min(lowest[r1], lowest[r2])
+            bridges.append((n1, n2, d))
+            if components.count == 1:
+                break
+        
+        new_pipes = self._create_pipes(pipe_id, *zip(*bridges))
+        pipes.extend(new_pipes)
+        return pipes, pipe_id + len(new_pipes)
     
     def _connect_sources(
         self,
-        G: nx.Graph,
         nodes: List[GasNode],
         pipes: List[GasPipe],
         pipe_id: int,
-        n_sources: int
+        n_sources: int,
+        dist: np.ndarray
     ) -> Tuple[List[GasPipe], int]:
         """Ensure source nodes are well-connected to the network."""
         for source_id in range(n_sources):
-            source = nodes[source_id]
+            neighbors = {
+                p.target_id if p.source_id == source_id else p.source_id
+                for p in pipes if source_id in (p.source_id, p.target_id)
+            }
             
             # Ensure at least 3 connections from each source
-            current_degree = G.degree(source_id)
-            if current_degree < 3:
+            current_degree = len(neighbors)
+            n_missing = min(3 - current_degree, len(nodes) - 1 - current_degree)
+            if n_missing > 0:
                 # Find nearest non-connected nodes
-                distances = []
-                for i, node in enumerate(nodes):
-                    if i != source_id and not G.has_edge(source_id, i):
-                        dist = self._calculate_distance(source, node)
-                        distances.append((dist, i))
-                
-                distances.sort()
+                row = dist[source_id].copy()
+                row[source_id] = np.inf
+                row[list(neighbors)] = np.inf
+                nearest = np.argpartition(row, n_missing - 1)[:n_missing]
+                nearest = nearest[np.argsort(row[nearest], kind='stable')]
                 
-                for dist, target_id in distances[:3 - current_degree]:
-                    pipe = self._create_pipe(pipe_id, source, nodes[target_id], dist)
-                    pipes.append(pipe)
-                    G.add_edge(source_id, target_id, **pipe.to_dict())
-                    pipe_id += 1
+                new_pipes = self._create_pipes(
+                    pipe_id, [source_id] * n_missing, nearest.tolist(), row[nearest].tolist()
+                )
+                pipes.extend(new_pipes)
+                pipe_id += len(new_pipes)
         
         return pipes, pipe_id
     
-    def _generate_node_name(self, node_type: NodeType, index: int) -> str:
-        """Generate a realistic name for a node."""
-        residential_names = [
-            "Oak Street", "Maple Drive", "Cedar Lane", "Pine Court",
-            "Elm Avenue", "Walnut Way", "Birch Road", "Willow Place",
-            "Cherry Hill", "Hickory Lane", "Spruce Street", "Ash Drive"
-        ]
-        
-        commercial_names = [
-            "Walmart Store", "Sam's Club", "Downtown Plaza", "Market Square",
-            "Business Center", "Shopping Center", "Retail Park", "Commerce Way",
-            "Trade Center", "Service Station", "Office Complex", "Medical Center"
-        ]
-        
-        industrial_names = [
-            "Distribution Center", "Warehouse Complex", "Manufacturing Plant",
-            "Processing Facility", "Industrial Park", "Logistics Hub",
-            "Factory Site", "Production Center"
-        ]
+    def _generate_node_name(self, node_type: NodeType, index: int, u_name: float) -> str:
+        """Generate a realistic name for a node (u_name: uniform [0, 1) draw)."""
+        names = self.NODE_NAMES[node_type]
+        name = names[int(u_name * len(names))]
         
         if node_type == NodeType.RESIDENTIAL:
-            name = random.choice(residential_names)
             return f"{index} {name}"
-        elif node_type == NodeType.COMMERCIAL:
-            return f"{random.choice(commercial_names)} #{index}"
         else:
-            return f"{random.choice(industrial_names)} #{index}"
+            return f"{name} #{index}"
     
     def save_network(
         self,
@@ -445,26 +571,28 @@ class CityNetworkGenerator:
         }
         
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     @staticmethod
     def load_network(filepath: str) -> Tuple[List[GasNode], List[GasPipe], nx.Graph]:
         """Load a network from a JSON file."""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = orjson.loads(f.read())
         
         nodes = [GasNode(**n) for n in data['nodes']]
         pipes = [GasPipe(**p) for p in data['pipes']]
         
-        # Reconstruct graph
+        return nodes, pipes, CityNetworkGenerator.build_graph(nodes, pipes)
+    
+    @staticmethod
+    def build_graph(nodes: List[GasNode], pipes: List[GasPipe]) -> nx.Graph:
+        """Reconstruct the networkx graph of a network from its nodes and pipes."""
         G = nx.Graph()
-        for node in nodes:
-            G.add_node(node.id, **node.to_dict())
-        for pipe in pipes:
-            G.add_edge(pipe.source_id, pipe.target_id, **pipe.to_dict())
+        G.add_nodes_from((node.id, node.to_dict()) for node in nodes)
+        G.add_edges_from((pipe.source_id, pipe.target_id, pipe.to_dict()) for pipe in pipes)
         
-        return nodes, pipes, G
+        return G
 
 
 def generate_sample_network(
@@ -78,7 +78,9 @@ export function useWebSocket(): UseWebSocketReturn {
       
       switch (message.type) {
         case 'SIMULATION_UPDATE':
-          // Update simulation cache with fresh data
+          // Update simulation cache with fresh data (after a leak injection
+          // the payload also carries injected_node_ids; active_leaks is
+          // already up to date, so no refetch is needed)
           queryClient.setQueryData(queryKeys.simulation, message.payload);
           setLastUpdate(new Date());
           break;
@@ -90,6 +92,7 @@ export function useWebSocket(): UseWebSocketReturn {
           break;
           
         case 'LEAK_ALERT':
+          // Legacy: the server now folds leak alerts into SIMULATION_UPDATE
           // Invalidate both to get updated state
           queryClient.invalidateQueries({ queryKey: queryKeys.network });
           queryClient.invalidateQueries({ queryKey: queryKeys.simulation });
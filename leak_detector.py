@@ -18,6 +18,124 @@ from collections import defaultdict
 import heapq
 
 
+def _csr_adjacency(
+    graph: nx.Graph,
+    node_ids: List[int],
+    row_of: Dict[int, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Neighbors of `node_ids` in CSR form: the neighbors of node_ids[i] are the
+    rows indices[indptr[i]:indptr[i + 1]] (positions in node_ids).
+    """
+    adj = graph.adj
+    degree = [len(adj[node_id]) for node_id in node_ids]
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.intp)
+    np.cumsum(degree, out=indptr[1:])
+    indices = np.fromiter(
+        (row_of[m] for node_id in node_ids for m in adj[node_id]),
+        dtype=np.intp, count=int(indptr[-1])
+    )
+    return indptr, indices
+
+
+def _multi_source_bfs(indptr: np.ndarray, indices: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """
+    Hop distance from every CSR row to the nearest of the `sources` rows
+    (-1 where none is reachable), expanding one whole BFS level at a time.
+    """
+    hops = np.full(len(indptr) - 1, -1, dtype=np.int64)
+    hops[sources] = 0
+    frontier = np.unique(sources)
+    level = 0
+    while frontier.size:
+        level += 1
+        # Gather the neighbor rows of the whole frontier in one go
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        offsets = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        neighbors = indices[offsets]
+        frontier = np.unique(neighbors[hops[neighbors] < 0])
+        hops[frontier] = level
+    return hops
+
+
+def _score_kernel(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    pressures: np.ndarray,
+    expected: np.ndarray,
+    mean_pressure: float,
+    std_pressure: float,
+    deficit_threshold: float,
+    ratio_threshold: float
+) -> Tuple[np.ndarray, ...]:
+    """
+    Score every row of a CSR network at once.
+    
+    Returns (deficit, deficit_ratio, neighbor_avg, is_anomalous, downstream,
+    score, pressure_gradient) as arrays aligned with `pressures`.
+    """
+    # Pressure deficit
+    deficit = expected - pressures
+    deficit_ratio = np.divide(
+        deficit, expected, out=np.zeros_like(deficit), where=expected > 0
+    )
+    
+    # Z-score for outlier detection
+    if std_pressure > 0:
+        z_score = (mean_pressure - pressures) / std_pressure
+    else:
+        z_score = np.zeros_like(pressures)
+    
+    # Neighbor analysis: per-row mean / max / count below the node itself
+    # (0 for nodes without neighbors)
+    degree = np.diff(indptr)
+    rows = np.repeat(np.arange(len(pressures)), degree)
+    neighbor_pressures = pressures[indices]
+    neighbor_avg = np.zeros_like(pressures)
+    neighbor_max = np.zeros_like(pressures)
+    has_neighbors = degree > 0
+    if indices.size:
+        starts = indptr[:-1][has_neighbors]
+        neighbor_avg[has_neighbors] = (
+            np.add.reduceat(neighbor_pressures, starts) / degree[has_neighbors]
+        )
+        neighbor_max[has_neighbors] = np.maximum.reduceat(neighbor_pressures, starts)
+    
+    # Pressure gradient from neighbors (high gradient = likely leak source;
+    # 0 for nodes without neighbors)
+    pressure_gradient = np.where(has_neighbors, neighbor_max - pressures, 0.0)
+    
+    # Is this an isolated drop? (neighbors have higher pressure)
+    is_isolated = (neighbor_avg > pressures * 1.5) & (deficit_ratio > ratio_threshold)
+    
+    # Check if this node has anomalously low pressure compared to surroundings
+    is_pressure_sink = (neighbor_max > pressures * 2) & (pressures < mean_pressure * 0.5)
+    
+    # Count downstream affected nodes (simplified)
+    downstream = np.bincount(
+        rows, weights=neighbor_pressures < pressures[rows], minlength=len(pressures)
+    ).astype(int)
+    
+    # Combined score with emphasis on pressure sinks: one weighted sum of the
+    # condition masks, added in the same order as the individual checks
+    score = np.minimum(
+        0.2 * (deficit > deficit_threshold)
+        + 0.2 * (deficit_ratio > ratio_threshold)
+        + 0.2 * is_isolated
+        + 0.3 * is_pressure_sink
+        + 0.2 * (z_score > 2)  # Statistical outlier
+        + 0.2 * (pressure_gradient > 100)  # Large gradient indicates leak source
+        + 0.1 * np.minimum(downstream, 5) / 5,
+        1.0
+    )
+    
+    return (
+        deficit, deficit_ratio, neighbor_avg, is_isolated | is_pressure_sink, downstream, score,
+        pressure_gradient
+    )
+
+
 @dataclass
 class LeakDetectionResult:
     """Result of leak detection analysis."""
@@ -40,6 +158,61 @@ class AnomalyScore:
     score: float  # Combined anomaly score
 
 
+@dataclass(frozen=True)
+class NetworkIndex:
+    """
+    Array view of a network shared by the detection helpers.
+    
+    Row i describes node node_ids[i]; its neighbors are the rows
+    indices[indptr[i]:indptr[i + 1]].
+    """
+    node_ids: np.ndarray
+    id_to_row: Dict[int, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    source_mask: np.ndarray
+    
+    @classmethod
+    def build(cls, graph: nx.Graph, nodes: List) -> "NetworkIndex":
+        """Index `nodes` (in list order) and their adjacency in `graph`."""
+        node_ids = [n.id for n in nodes]
+        id_to_row = {node_id: row for row, node_id in enumerate(node_ids)}
+        indptr, indices = _csr_adjacency(graph, node_ids, id_to_row)
+        return cls(
+            node_ids=np.array(node_ids, dtype=np.int64),
+            id_to_row=id_to_row,
+            indptr=indptr,
+            indices=indices,
+            source_mask=np.array([n.node_type == "source" for n in nodes], dtype=bool)
+        )
+    
+    @classmethod
+    def of(cls, graph: nx.Graph, nodes: List) -> "NetworkIndex":
+        """
+        Index cached on the graph, rebuilt whenever it is asked for with a
+        different `nodes` list.
+        """
+        cached = graph.graph.get('_index')
+        if cached is None or cached[0] is not nodes:
+            cached = (nodes, cls.build(graph, nodes))
+            graph.graph['_index'] = cached
+        return cached[1]
+
+
+def _pressures_of(state, node_ids: np.ndarray, missing: float = 0.0) -> np.ndarray:
+    """
+    Node pressures of `state` as a float64 array aligned with `node_ids`
+    (`missing` for nodes without a reading). Reuses the state's own pressure
+    array when it is already in that order.
+    """
+    if np.array_equal(state.node_ids, node_ids):
+        return state.node_pressures_arr
+    return np.fromiter(
+        (state.node_pressures.get(i, missing) for i in node_ids.tolist()),
+        dtype=np.float64, count=len(node_ids)
+    )
+
+
 class LeakDetector:
     """
     Intelligent leak detection system for gas distribution networks.
@@ -51,6 +224,10 @@ class LeakDetector:
     4. Statistical Outlier Detection
     """
     
+    # Node pressure upper bounds (kPa) of each severity level but the last
+    SEVERITY_BOUNDS = np.array([10.0, 50.0, 150.0])
+    SEVERITY_LEVELS = ("critical", "severe", "moderate", "minor")
+    
     def __init__(
         self,
         pressure_deficit_threshold: float = 50.0,  # kPa
@@ -62,6 +239,8 @@ class LeakDetector:
         self.deficit_ratio_threshold = deficit_ratio_threshold
         self.min_confidence_threshold = min_confidence_threshold
         self.source_pressure = source_pressure
+        # (nodes, node_ids, source_mask) of the last quick_scan node list
+        self._scan_index: Optional[Tuple[List, np.ndarray, np.ndarray]] = None
     
     def analyze_network(
         self,
@@ -84,33 +263,33 @@ class LeakDetector:
         Returns:
             LeakDetectionResult with detected leaks and analysis
         """
-        # Build node lookup
-        node_dict = {n.id: n for n in nodes}
-        source_ids = {n.id for n in nodes if n.node_type == "source"}
+        idx = NetworkIndex.of(graph, nodes)
+        pressures = _pressures_of(simulation_state, idx.node_ids)
         
         # Step 1: Calculate expected pressures (baseline or theoretical)
         if baseline_state:
-            expected_pressures = baseline_state.node_pressures
-        else:
-            expected_pressures = self._estimate_expected_pressures(
-                graph, nodes, source_ids
+            expected = _pressures_of(
+                baseline_state, idx.node_ids, missing=self.source_pressure * 0.8
             )
+        else:
+            expected = self._estimate_expected_pressures(idx)
         
         # Step 2: Calculate anomaly scores for all nodes
-        anomaly_scores = self._calculate_anomaly_scores(
-            graph, nodes, simulation_state, expected_pressures, source_ids
-        )
+        anomaly_scores, gradients = self._calculate_anomaly_scores(idx, pressures, expected)
         
         # Step 3: Identify candidate leak locations
         candidates = self._identify_candidates(anomaly_scores)
         
         # Step 4: Cluster nearby anomalies to find leak epicenters
-        leak_clusters = self._cluster_anomalies(graph, candidates, node_dict)
+        leak_clusters = self._cluster_anomalies(idx, candidates)
         
         # Step 5: Trace propagation to refine leak locations
-        refined_leaks = self._trace_leak_sources(
-            graph, leak_clusters, simulation_state, node_dict, source_ids
-        )
+        refined_leaks = self._trace_leak_sources(idx, leak_clusters, pressures, gradients)
+        
+        # Node lookup for the reported leaks only (via the cached index rows)
+        node_dict = {
+            leak['node_id']: nodes[idx.id_to_row[leak['node_id']]] for leak in refined_leaks
+        }
         
         # Step 6: Calculate confidence scores
         confidence_scores = self._calculate_confidence(
@@ -118,9 +297,7 @@ class LeakDetector:
         )
         
         # Step 7: Identify all affected nodes
-        affected_nodes = self._find_affected_nodes(
-            graph, refined_leaks, simulation_state, source_ids
-        )
+        affected_nodes = self._find_affected_nodes(idx, refined_leaks, pressures)
         
         # Step 8: Generate recommendations
         recommendations = self._generate_recommendations(
@@ -143,7 +320,9 @@ class LeakDetector:
             })
         
         # Sort by confidence
-        detected_leaks.sort(key=lambda x: x['confidence'], reverse=True)
+        confidences = np.array([leak['confidence'] for leak in detected_leaks], dtype=np.float64)
+        order = np.argsort(-confidences, kind='stable')
+        detected_leaks = [detected_leaks[i] for i in order.tolist()]
         
         return LeakDetectionResult(
             detected_leaks=detected_leaks,
@@ -161,174 +340,109 @@ class LeakDetector:
             recommendations=recommendations
         )
     
-    def _estimate_expected_pressures(
-        self,
-        graph: nx.Graph,
-        nodes: List,
-        source_ids: Set[int]
-    ) -> Dict[int, float]:
+    def _estimate_expected_pressures(self, idx: NetworkIndex) -> np.ndarray:
         """
         Estimate expected pressures based on network topology.
         Uses shortest path distance from sources.
+        Returns an array aligned with the rows of `idx`.
         """
-        expected = {}
-        
-        # Calculate shortest paths from all sources
-        min_distances = {}
-        for source_id in source_ids:
-            distances = nx.single_source_shortest_path_length(graph, source_id)
-            for node_id, dist in distances.items():
-                if node_id not in min_distances:
-                    min_distances[node_id] = dist
-                else:
-                    min_distances[node_id] = min(min_distances[node_id], dist)
-        
-        # Estimate pressure based on distance
-        max_distance = max(min_distances.values()) if min_distances else 1
-        
-        for node in nodes:
-            if node.id in source_ids:
-                expected[node.id] = self.source_pressure
-            else:
-                dist = min_distances.get(node.id, max_distance)
-                # Pressure drops with distance (simplified model)
-                drop_factor = 0.05 * dist  # 5% drop per hop
-                expected[node.id] = self.source_pressure * (1 - min(drop_factor, 0.7))
+        # Hop distance to the nearest source: one BFS seeded with every source
+        # (-1 for nodes no source reaches)
+        hops = _multi_source_bfs(idx.indptr, idx.indices, np.flatnonzero(idx.source_mask))
+        
+        # Estimate pressure based on distance; unreached nodes count as farthest
+        reached = hops >= 0
+        hops[~reached] = hops[reached].max() if reached.any() else 1
+        
+        # Pressure drops with distance (simplified model): 5% drop per hop
+        expected = self.source_pressure * (1 - np.minimum(0.05 * hops, 0.7))
+        expected[idx.source_mask] = self.source_pressure
         
         return expected
     
     def _calculate_anomaly_scores(
         self,
-        graph: nx.Graph,
-        nodes: List,
-        state,
-        expected_pressures: Dict[int, float],
-        source_ids: Set[int]
-    ) -> List[AnomalyScore]:
-        """Calculate anomaly scores for all nodes."""
-        scores = []
+        idx: NetworkIndex,
+        pressures: np.ndarray,
+        expected: np.ndarray
+    ) -> Tuple[List[AnomalyScore], np.ndarray]:
+        """
+        Calculate anomaly scores for all nodes.
+        Also returns the per-row neighbor pressure gradient for leak tracing.
+        """
+        consumer = ~idx.source_mask
         
         # Find nodes with active leaks (they will have dramatically low pressure)
-        all_pressures = [
-            state.node_pressures.get(n.id, 0) 
-            for n in nodes if n.id not in source_ids
-        ]
-        
-        if all_pressures:
-            mean_pressure = np.mean(all_pressures)
-            std_pressure = np.std(all_pressures) if len(all_pressures) > 1 else 1
+        all_pressures = pressures[consumer]
+        
+        if all_pressures.size > 1:
+            # Population std from the mean already at hand (np.std would
+            # recompute it)
+            mean_pressure = all_pressures.mean()
+            centered = all_pressures - mean_pressure
+            std_pressure = np.sqrt(np.mean(centered * centered))
+        elif all_pressures.size:
+            mean_pressure = all_pressures.mean()
+            std_pressure = 1
         else:
             mean_pressure = self.source_pressure * 0.5
             std_pressure = 50
         
-        for node in nodes:
-            if node.id in source_ids:
-                continue
-            
-            actual = state.node_pressures.get(node.id, 0)
-            expected = expected_pressures.get(node.id, self.source_pressure * 0.8)
-            
-            # Pressure deficit
-            deficit = expected - actual
-            deficit_ratio = deficit / expected if expected > 0 else 0
-            
-            # Z-score for outlier detection
-            z_score = (mean_pressure - actual) / std_pressure if std_pressure > 0 else 0
-            
-            # Neighbor analysis
-            neighbor_pressures = [
-                state.node_pressures.get(n, 0)
-                for n in graph.neighbors(node.id)
-            ]
-            neighbor_avg = np.mean(neighbor_pressures) if neighbor_pressures else 0
-            neighbor_max = max(neighbor_pressures) if neighbor_pressures else 0
-            
-            # Pressure gradient from neighbors (high gradient = likely leak source)
-            pressure_gradient = neighbor_max - actual
-            
-            # Is this an isolated drop? (neighbors have higher pressure)
-            is_isolated = (
-                neighbor_avg > actual * 1.5 and
-                deficit_ratio > self.deficit_ratio_threshold
-            )
-            
-            # Check if this node has anomalously low pressure compared to surroundings
-            is_pressure_sink = (
-                neighbor_max > actual * 2 and actual < mean_pressure * 0.5
-            )
-            
-            # Count downstream affected nodes (simplified)
-            downstream = sum(
-                1 for n in graph.neighbors(node.id)
-                if state.node_pressures.get(n, 0) < actual
+        (
+            deficit, deficit_ratio, neighbor_avg, is_anomalous, downstream, score,
+            pressure_gradient
+        ) = _score_kernel(
+            idx.indptr, idx.indices, pressures, expected, mean_pressure, std_pressure,
+            self.pressure_deficit_threshold, self.deficit_ratio_threshold
+        )
+        
+        # One AnomalyScore per consumer node (columns in field order)
+        anomaly_scores = [
+            AnomalyScore(*values)
+            for values in zip(
+                idx.node_ids[consumer].tolist(),
+                deficit[consumer].tolist(),
+                deficit_ratio[consumer].tolist(),
+                neighbor_avg[consumer].tolist(),
+                is_anomalous[consumer].tolist(),
+                downstream[consumer].tolist(),
+                score[consumer].tolist()
             )
-            
-            # Combined score with emphasis on pressure sinks
-            score = 0
-            if deficit > self.pressure_deficit_threshold:
-                score += 0.2
-            if deficit_ratio > self.deficit_ratio_threshold:
-                score += 0.2
-            if is_isolated:
-                score += 0.2
-            if is_pressure_sink:
-                score += 0.3
-            if z_score > 2:  # Statistical outlier
-                score += 0.2
-            if pressure_gradient > 100:  # Large gradient indicates leak source
-                score += 0.2
-            if downstream > 0:
-                score += 0.1 * min(downstream, 5) / 5
-            
-            scores.append(AnomalyScore(
-                node_id=node.id,
-                pressure_deficit=deficit,
-                deficit_ratio=deficit_ratio,
-                neighbor_avg_pressure=neighbor_avg,
-                is_isolated_drop=is_isolated or is_pressure_sink,
-                downstream_affected=downstream,
-                score=min(score, 1.0)
-            ))
-        
-        return scores
+        ]
+        
+        return anomaly_scores, pressure_gradient
     
     def _identify_candidates(
         self,
         anomaly_scores: List[AnomalyScore]
     ) -> List[AnomalyScore]:
         """Identify candidate leak locations based on anomaly scores."""
+        n = len(anomaly_scores)
+        deficits = np.fromiter((a.pressure_deficit for a in anomaly_scores), dtype=np.float64, count=n)
+        ratios = np.fromiter((a.deficit_ratio for a in anomaly_scores), dtype=np.float64, count=n)
+        scores = np.fromiter((a.score for a in anomaly_scores), dtype=np.float64, count=n)
+        isolated = np.fromiter((a.is_isolated_drop for a in anomaly_scores), dtype=bool, count=n)
+        
         # First, find nodes with extremely low pressure (likely leak locations)
-        severe_candidates = [
-            a for a in anomaly_scores
-            if a.pressure_deficit > self.source_pressure * 0.6  # More than 60% deficit
-            or a.is_isolated_drop
-        ]
+        severe = (deficits > self.source_pressure * 0.6) | isolated  # More than 60% deficit
         
         # Then add moderate anomalies
-        moderate_candidates = [
-            a for a in anomaly_scores
-            if a.score >= self.min_confidence_threshold
-            or a.deficit_ratio > self.deficit_ratio_threshold * 1.5
-        ]
-        
-        # Combine and deduplicate
-        seen_ids = set()
-        candidates = []
-        for a in severe_candidates + moderate_candidates:
-            if a.node_id not in seen_ids:
-                candidates.append(a)
-                seen_ids.add(a.node_id)
+        moderate = (
+            (scores >= self.min_confidence_threshold)
+            | (ratios > self.deficit_ratio_threshold * 1.5)
+        )
         
-        # Sort by pressure deficit (most severe first), then by score
-        candidates.sort(key=lambda x: (x.pressure_deficit, x.score), reverse=True)
+        # Sort by pressure deficit (most severe first), then by score; ties keep
+        # severe candidates ahead of moderate ones, each in input order
+        rows = np.flatnonzero(severe | moderate)
+        order = np.lexsort((rows, ~severe[rows], -scores[rows], -deficits[rows]))
         
-        return candidates
+        return [anomaly_scores[i] for i in rows[order].tolist()]
     
     def _cluster_anomalies(
         self,
-        graph: nx.Graph,
-        candidates: List[AnomalyScore],
-        node_dict: Dict
+        idx: NetworkIndex,
+        candidates: List[AnomalyScore]
     ) -> List[List[int]]:
         """
         Cluster nearby anomalies to identify leak epicenters.
@@ -337,45 +451,36 @@ class LeakDetector:
         if not candidates:
             return []
         
-        candidate_ids = {c.node_id for c in candidates}
-        clusters = []
-        visited = set()
-        
-        for candidate in candidates:
-            if candidate.node_id in visited:
-                continue
-            
-            # BFS to find connected anomalies
-            cluster = []
-            queue = [candidate.node_id]
-            
-            while queue:
-                node_id = queue.pop(0)
-                if node_id in visited:
-                    continue
-                
-                visited.add(node_id)
-                
-                if node_id in candidate_ids:
-                    cluster.append(node_id)
-                    
-                    # Add neighbors to queue (limited depth)
-                    for neighbor in graph.neighbors(node_id):
-                        if neighbor not in visited:
-                            queue.append(neighbor)
-            
-            if cluster:
-                clusters.append(cluster)
-        
-        return clusters
+        # Connected components of the subgraph induced by the candidates,
+        # by union-find over candidate-candidate edges only
+        candidate_rows = [idx.id_to_row[c.node_id] for c in candidates]
+        parent = {row: row for row in candidate_rows}
+        
+        def find(row):
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+        
+        indptr, indices = idx.indptr, idx.indices
+        for row in candidate_rows:
+            for neighbor in indices[indptr[row]:indptr[row + 1]].tolist():
+                if neighbor in parent:
+                    parent[find(neighbor)] = find(row)
+        
+        # Clusters in order of their first (most severe) candidate
+        clusters = defaultdict(list)
+        for candidate, row in zip(candidates, candidate_rows):
+            clusters[find(row)].append(candidate.node_id)
+        
+        return list(clusters.values())
     
     def _trace_leak_sources(
         self,
-        graph: nx.Graph,
+        idx: NetworkIndex,
         clusters: List[List[int]],
-        state,
-        node_dict: Dict,
-        source_ids: Set[int]
+        pressures: np.ndarray,
+        gradients: np.ndarray
     ) -> List[Dict]:
         """
         Trace back from clusters to find likely leak source.
@@ -383,53 +488,40 @@ class LeakDetector:
         has neighbors with significantly higher pressure.
         """
         leak_sources = []
+        leak_pressures = []
+        id_to_row = idx.id_to_row
         
         for cluster in clusters:
             if not cluster:
                 continue
             
             # Find node with lowest pressure in cluster - this is likely the leak
-            best_candidate = min(
-                cluster,
-                key=lambda x: state.node_pressures.get(x, float('inf'))
-            )
-            
-            # Calculate maximum pressure gradient (difference from highest neighbor)
-            best_pressure = state.node_pressures.get(best_candidate, 0)
-            
-            neighbor_pressures = [
-                state.node_pressures.get(n, 0)
-                for n in graph.neighbors(best_candidate)
-            ]
-            max_neighbor = max(neighbor_pressures) if neighbor_pressures else best_pressure
-            gradient = max_neighbor - best_pressure
-            
-            # Determine severity based on pressure at node
-            node_pressure = state.node_pressures.get(best_candidate, 0)
-            if node_pressure < 10:
-                severity = "critical"
-            elif node_pressure < 50:
-                severity = "severe"
-            elif node_pressure < 150:
-                severity = "moderate"
-            else:
-                severity = "minor"
+            # (equal pressures, e.g. nodes clamped at the floor, go to the
+            # lowest node id so the pick doesn't depend on cluster order)
+            rows = np.fromiter((id_to_row[i] for i in cluster), dtype=np.intp, count=len(cluster))
+            best_row = rows[np.lexsort((idx.node_ids[rows], pressures[rows]))[0]]
+            best_pressure = pressures[best_row]
             
             leak_sources.append({
-                'node_id': best_candidate,
+                'node_id': idx.node_ids[best_row].tolist(),
                 'cluster_size': len(cluster),
-                'severity': severity,
-                'pressure_deficit': self.source_pressure * 0.8 - node_pressure,
+                'pressure_deficit': (self.source_pressure * 0.8 - best_pressure).tolist(),
                 'affected_downstream': len(cluster) - 1,
-                'pressure_gradient': gradient
+                # Difference from highest neighbor, as computed by the scoring kernel
+                'pressure_gradient': gradients[best_row].tolist()
             })
+            leak_pressures.append(best_pressure)
+        
+        # Determine severity based on pressure at node
+        leak_pressures = np.array(leak_pressures, dtype=np.float64)
+        levels = np.searchsorted(self.SEVERITY_BOUNDS, leak_pressures, side='right')
+        for leak, level in zip(leak_sources, levels.tolist()):
+            leak['severity'] = self.SEVERITY_LEVELS[level]
         
         # Sort by severity (lowest pressure first)
-        leak_sources.sort(
-            key=lambda x: state.node_pressures.get(x['node_id'], float('inf'))
-        )
+        order = np.argsort(leak_pressures, kind='stable')
         
-        return leak_sources
+        return [leak_sources[i] for i in order.tolist()]
     
     def _calculate_confidence(
         self,
@@ -469,24 +561,15 @@ class LeakDetector:
     
     def _find_affected_nodes(
         self,
-        graph: nx.Graph,
+        idx: NetworkIndex,
         leak_sources: List[Dict],
-        state,
-        source_ids: Set[int]
+        pressures: np.ndarray
     ) -> List[int]:
         """Find all nodes affected by the detected leaks."""
-        affected = set()
-        
         # Low pressure threshold
         threshold = self.source_pressure * 0.5
         
-        for node_id, pressure in state.node_pressures.items():
-            if node_id in source_ids:
-                continue
-            if pressure < threshold:
-                affected.add(node_id)
-        
-        return list(affected)
+        return idx.node_ids[(pressures < threshold) & ~idx.source_mask].tolist()
     
     def _generate_recommendations(
         self,
@@ -547,18 +630,22 @@ class LeakDetector:
         Quick scan for obvious pressure anomalies.
         Returns list of node IDs with significant pressure drops.
         """
-        source_ids = {n.id for n in nodes if n.node_type == "source"}
-        anomalies = []
+        if self._scan_index is None or self._scan_index[0] is not nodes:
+            node_ids = np.fromiter((n.id for n in nodes), dtype=np.int64, count=len(nodes))
+            source_mask = np.fromiter(
+                (n.node_type == "source" for n in nodes), dtype=bool, count=len(nodes)
+            )
+            self._scan_index = (nodes, node_ids, source_mask)
+        _, node_ids, source_mask = self._scan_index
         
-        for node in nodes:
-            if node.id in source_ids:
-                continue
-            
-            pressure = state.node_pressures.get(node.id, 0)
-            if pressure < self.source_pressure * threshold_ratio:
-                anomalies.append(node.id)
+        pressures = _pressures_of(state, node_ids)
+        threshold = self.source_pressure * threshold_ratio
         
-        return anomalies
+        return node_ids[(pressures < threshold) & ~source_mask].tolist()
+
+
+# Detector reused by detect_leaks while its thresholds stay the same
+_shared_detector: Optional[LeakDetector] = None
 
 
 def detect_leaks(
@@ -583,10 +670,17 @@ def detect_leaks(
     Returns:
         LeakDetectionResult
     """
-    detector = LeakDetector(
-        pressure_deficit_threshold=pressure_threshold,
-        min_confidence_threshold=confidence_threshold
-    )
+    global _shared_detector
+    detector = _shared_detector
+    if (
+        detector is None
+        or detector.pressure_deficit_threshold != pressure_threshold
+        or detector.min_confidence_threshold != confidence_threshold
+    ):
+        detector = _shared_detector = LeakDetector(
+            pressure_deficit_threshold=pressure_threshold,
+            min_confidence_threshold=confidence_threshold
+        )
     
     return detector.analyze_network(graph, nodes, pipes, simulation_state)
 
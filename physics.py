@@ -39,6 +39,13 @@ class SimulationState:
     pipe_reynolds: Dict[int, float] = field(default_factory=dict)  # dimensionless
     active_leaks: Dict[int, float] = field(default_factory=dict)  # node_id -> leak_rate m³/h
     timestamp: float = 0.0
+    # node_pressures as parallel arrays (same order), for vectorized consumers
+    node_ids: np.ndarray = field(
+        default_factory=lambda: np.empty(0, dtype=np.int64), compare=False
+    )
+    node_pressures_arr: np.ndarray = field(
+        default_factory=lambda: np.empty(0), compare=False
+    )
 
 
 @dataclass 
@@ -343,6 +350,10 @@ class PhysicsEngine:
             if max_change < convergence_threshold:
                 break
         
+        n = len(state.node_pressures)
+        state.node_ids = np.fromiter(state.node_pressures.keys(), dtype=np.int64, count=n)
+        state.node_pressures_arr = np.fromiter(state.node_pressures.values(), dtype=float, count=n)
+        
         return state
     
     def calculate_system_metrics(
@@ -416,6 +427,9 @@ class PhysicsEngine:
             "total_pipes": len(pipes)
         }
     
+    # get_pressure_status() levels, lowest first
+    PRESSURE_STATUSES = ("critical", "warning", "low", "normal", "optimal")
+    
     def get_pressure_status(self, pressure: float) -> str:
         """Categorize pressure level."""
         if pressure >= self.source_pressure * 0.7:
@@ -428,6 +442,24 @@ class PhysicsEngine:
             return "warning"
         else:
             return "critical"
+    
+    def classify_pressures(self, pressures: np.ndarray) -> np.ndarray:
+        """
+        Vectorized get_pressure_status().
+        
+        Returns:
+            Index into PRESSURE_STATUSES for each pressure
+        """
+        thresholds = np.array([
+            self.min_delivery_pressure,
+            self.min_delivery_pressure * 5,
+            self.source_pressure * 0.4,
+            self.source_pressure * 0.7,
+        ])
+        # get_pressure_status checks from the top, so a level whose threshold is
+        # above the next level's is unreachable - cap it to keep the bins sorted
+        thresholds = np.minimum.accumulate(thresholds[::-1])[::-1]
+        return np.digitize(pressures, thresholds)
 
 
 class LeakSimulator:
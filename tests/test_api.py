@@ -97,6 +97,15 @@ class TestSimulationEndpoints:
         assert "node_actual_demand" in data
         assert len(data["node_pressures"]) > 0
     
+    def test_simulate_keys_are_node_and_pipe_ids(self, client):
+        """Result dicts should be keyed by the network's node/pipe IDs (as JSON strings)."""
+        network = client.get("/api/network").json()
+        
+        data = client.post("/api/simulate", json={"source_pressure": 400}).json()
+        
+        assert set(data["node_pressures"]) == {str(n["id"]) for n in network["nodes"]}
+        assert set(data["pipe_flow_rates"]) == {str(p["id"]) for p in network["pipes"]}
+    
     def test_simulate_respects_source_pressure(self, client):
         """Simulation should use provided source pressure."""
         client.get("/api/network")
@@ -165,7 +174,12 @@ class TestLeakEndpoints:
         assert "strategy_used" in data
         assert "detection_time_ms" in data
         assert data["strategy_used"] == "combined"
-    
+
+    def test_detect_leaks_unknown_strategy(self, client):
+        """An unknown detection strategy should be rejected."""
+        response = client.post("/api/leaks/detect", json={"strategy": "guess"})
+        assert response.status_code == 422
+
     def test_clear_leaks(self, client):
         """Clear leaks should remove all active leaks."""
         client.get("/api/network")
@@ -322,6 +336,25 @@ class TestLeakLifecycle:
         for nid in first_ids:
             assert nid not in active_ids
 
+    def test_reinject_same_leaks_keeps_state(self, client):
+        """Re-injecting the same leak set (in any order) should leave state unchanged."""
+        network = client.get("/api/network").json()
+        non_source_ids = [
+            n["id"] for n in network["nodes"] if n["node_type"] != "source"
+        ][:3]
+
+        client.post("/api/leaks/inject", json={"node_ids": non_source_ids})
+        before = client.get("/api/simulation/state").json()
+
+        response = client.post(
+            "/api/leaks/inject", json={"node_ids": list(reversed(non_source_ids))}
+        )
+        assert set(response.json()["injected_node_ids"]) == set(non_source_ids)
+
+        after = client.get("/api/simulation/state").json()
+        assert after["active_leaks"] == before["active_leaks"]
+        assert after["node_pressures"] == before["node_pressures"]
+
     def test_detect_leaks_with_explicit_sensor_ids(self, client):
         """Detect leaks using explicit sensor_node_ids."""
         network = client.get("/api/network").json()
@@ -412,6 +445,56 @@ class TestWebSocket:
             data = websocket.receive_json()
             assert data["type"] == "SIMULATION_UPDATE"
 
+    def test_websocket_coalesces_pressure_burst(self, client):
+        """A burst of SET_PRESSURE messages should settle on the last value."""
+        from api.main import app_state
+
+        client.get("/api/network")
+
+        with client.websocket_connect("/ws") as websocket:
+            websocket.receive_json()
+
+            for value in (410, 420, 430, 440, 450):
+                websocket.send_json({
+                    "type": "SET_PRESSURE",
+                    "payload": {"value": value}
+                })
+
+            data = websocket.receive_json()
+            assert data["type"] == "SIMULATION_UPDATE"
+            assert app_state.current_source_pressure == 450
+
+    def test_coalescer_survives_failed_error_report(self, monkeypatch):
+        """A simulation error the client can no longer receive must not stop the drain loop."""
+        import asyncio
+        from api import main
+
+        class ClosedWebSocket:
+            async def send_text(self, message):
+                raise RuntimeError("socket closed")
+
+        calls = []
+
+        def failing_simulation(**params):
+            calls.append(params)
+            raise ValueError("bad parameters")
+
+        monkeypatch.setattr(main.app_state, "run_simulation", failing_simulation)
+
+        async def scenario():
+            coalescer = main.SimulationCoalescer(ClosedWebSocket())
+            try:
+                coalescer.submit(source_pressure=400)
+                await asyncio.sleep(coalescer.DELAY * 3)
+                coalescer.submit(source_pressure=410)
+                await asyncio.sleep(coalescer.DELAY * 3)
+                assert not coalescer._task.done()
+            finally:
+                coalescer.cancel()
+
+        asyncio.run(scenario())
+        assert calls == [{"source_pressure": 400}, {"source_pressure": 410}]
+
     def test_websocket_set_demand_multiplier(self, client):
         """WebSocket should handle SET_DEMAND_MULTIPLIER message."""
         client.get("/api/network")
@@ -444,12 +527,30 @@ class TestWebSocket:
                 "payload": {"count": 1}
             })
 
-            # Should receive LEAK_ALERT then SIMULATION_UPDATE
-            msg1 = websocket.receive_json()
-            msg2 = websocket.receive_json()
-            types = {msg1["type"], msg2["type"]}
-            assert "LEAK_ALERT" in types
-            assert "SIMULATION_UPDATE" in types
+            # Should receive a single SIMULATION_UPDATE carrying the injected ids
+            data = websocket.receive_json()
+            assert data["type"] == "SIMULATION_UPDATE"
+            injected = data["payload"]["injected_node_ids"]
+            assert len(injected) == 1
+            assert str(injected[0]) in data["payload"]["active_leaks"]
+
+    def test_websocket_inject_leak_keeps_warnings(self, client):
+        """The INJECT_LEAK broadcast should carry the low-pressure warnings of the re-run."""
+        client.post("/api/network/generate", json={"node_count": 150})
+        client.post("/api/simulate", json={"source_pressure": 150})
+
+        with client.websocket_connect("/ws") as websocket:
+            websocket.receive_json()
+
+            websocket.send_json({
+                "type": "INJECT_LEAK",
+                "payload": {"count": 5}
+            })
+
+            data = websocket.receive_json()
+            assert data["type"] == "SIMULATION_UPDATE"
+            assert len(data["payload"]["injected_node_ids"]) == 5
+            assert data["payload"]["warnings"]
 
     def test_websocket_clear_leaks(self, client):
         """WebSocket should handle CLEAR_LEAKS message."""
@@ -464,8 +565,7 @@ class TestWebSocket:
                 "type": "INJECT_LEAK",
                 "payload": {"count": 1}
             })
-            # Consume the LEAK_ALERT and SIMULATION_UPDATE
-            websocket.receive_json()
+            # Consume the SIMULATION_UPDATE
             websocket.receive_json()
 
             # Now clear leaks
@@ -14,6 +14,7 @@ import numpy as np
 import networkx as nx
 import tempfile
 import json
+from dataclasses import asdict
 from pathlib import Path
 import sys
 
@@ -124,6 +125,7 @@ class TestGasNode:
         assert d['id'] == 1
         assert d['node_type'] == "commercial"
         assert d['base_demand'] == 15.0
+        assert d == asdict(node)
 
 
 class TestGasPipe:
@@ -161,6 +163,7 @@ class TestGasPipe:
         assert d['id'] == 5
         assert d['diameter'] == 0.1
         assert d['material'] == "polyethylene"
+        assert d == asdict(pipe)
 
 
 class TestCityNetworkGenerator:
@@ -232,6 +235,34 @@ class TestCityNetworkGenerator:
             assert n1.id == n2.id
             assert n1.x == pytest.approx(n2.x, rel=1e-10)
     
+    def test_connectivity_bridges_closest_components(self, generator):
+        """Test that isolated nodes are joined along the Euclidean MST."""
+        # A tiny radius leaves every node isolated, so every pipe added by
+        # the connectivity pass is a bridge between closest components
+        nodes, pipes, G = generator.generate_network(n_nodes=40, connection_radius=1e-9)
+        assert nx.is_connected(G)
+        
+        complete = nx.Graph()
+        for a in nodes:
+            for b in nodes[a.id + 1:]:
+                complete.add_edge(a.id, b.id, weight=np.hypot(a.x - b.x, a.y - b.y))
+        mst = nx.minimum_spanning_tree(complete)
+        assert all(G.has_edge(u, v) for u, v in mst.edges())
+    
+    def test_connectivity_bridges_start_in_lowest_component(self, generator):
+        """Test that each bridge runs from the component holding the lowest node id."""
+        nodes, pipes, G = generator.generate_network(n_nodes=40, connection_radius=1e-9)
+        
+        # Every node starts isolated, so the first n - 1 pipes are the bridges
+        members = {node.id: {node.id} for node in nodes}
+        for pipe in pipes[:len(nodes) - 1]:
+            source, target = members[pipe.source_id], members[pipe.target_id]
+            assert source is not target
+            assert min(source) < min(target)
+            source |= target
+            for i in target:
+                members[i] = source
+    
     def test_save_and_load_network(self, generator):
         """Test saving and loading network."""
         nodes, pipes, G = generator.generate_network(n_nodes=30)
@@ -0,0 +1,181 @@
+"""
+Tests for Database CRUD Helpers
+===============================
+Tests the parts of api.crud that run without a PostgreSQL server:
+- Current snapshot cache and its LISTEN connection
+- Monthly snapshot partition helpers
+"""
+
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from api import crud
+
+
+class FakeSession:
+    """Stands in for an AsyncSession; counts queries."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return SimpleNamespace(scalar_one_or_none=lambda: self.snapshot)
+
+
+class FakeListener:
+    """Stands in for the asyncpg LISTEN connection."""
+
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+@pytest.fixture(autouse=True)
+def reset_snapshot_cache(monkeypatch):
+    """Every test starts without a listener or cached snapshot."""
+    monkeypatch.setattr(crud, "_snapshot_listener", None)
+    monkeypatch.setattr(crud, "_listener_reconnect_task", None)
+    monkeypatch.setattr(crud, "_current_snapshot", None)
+
+
+class TestSnapshotCache:
+    """Tests for the process-local current snapshot cache."""
+
+    def test_not_cached_without_listener(self):
+        """Without a listener other workers' saves go unseen, so every read queries."""
+        db = FakeSession(SimpleNamespace(id=1))
+
+        asyncio.run(crud.get_current_snapshot(db))
+        asyncio.run(crud.get_current_snapshot(db))
+
+        assert db.queries == 2
+        assert crud._current_snapshot is None
+
+    def test_cached_while_listening(self, monkeypatch):
+        """With a live listener the second read is served from the cache."""
+        monkeypatch.setattr(crud, "_snapshot_listener", FakeListener())
+        db = FakeSession(SimpleNamespace(id=1))
+
+        asyncio.run(crud.get_current_snapshot(db))
+        snapshot = asyncio.run(crud.get_current_snapshot(db))
+
+        assert db.queries == 1
+        assert snapshot.id == 1
+
+    def test_closed_listener_disables_cache(self, monkeypatch):
+        """A cached snapshot is not trusted once the listener has closed."""
+        listener = FakeListener()
+        listener.closed = True
+        monkeypatch.setattr(crud, "_snapshot_listener", listener)
+        monkeypatch.setattr(crud, "_current_snapshot", SimpleNamespace(id=1))
+        db = FakeSession(SimpleNamespace(id=2))
+
+        snapshot = asyncio.run(crud.get_current_snapshot(db))
+
+        assert snapshot.id == 2
+        assert db.queries == 1
+
+    def test_lost_listener_clears_cache_and_reconnects(self, monkeypatch):
+        """Losing the LISTEN connection drops the cache and reconnects in the background."""
+        listener = FakeListener()
+        monkeypatch.setattr(crud, "_snapshot_listener", listener)
+        monkeypatch.setattr(crud, "_current_snapshot", SimpleNamespace(id=1))
+        monkeypatch.setattr(crud, "LISTENER_RECONNECT_DELAY", 0)
+        reconnected = FakeListener()
+
+        async def fake_connect():
+            crud._snapshot_listener = reconnected
+
+        monkeypatch.setattr(crud, "_connect_snapshot_listener", fake_connect)
+
+        async def scenario():
+            crud._on_snapshot_listener_lost(listener)
+            assert crud._snapshot_listener is None
+            assert crud._current_snapshot is None
+            await crud._listener_reconnect_task
+
+        asyncio.run(scenario())
+        assert crud._snapshot_listener is reconnected
+
+    def test_closing_listener_does_not_reconnect(self, monkeypatch):
+        """stop_snapshot_listener's own close must not schedule a reconnect."""
+        stale = FakeListener()
+
+        crud._on_snapshot_listener_lost(stale)
+
+        assert crud._listener_reconnect_task is None
+
+
+class TestSnapshotPartitions:
+    """Tests for the monthly partition helpers."""
+
+    def test_month_start(self):
+        """Test that a year/month becomes the first day of that month."""
+        assert crud._month_start(2024, 2) == date(2024, 2, 1)
+
+    @pytest.mark.parametrize("year, month", [
+        ("2024", 1),
+        (2024, "1"),
+        (2024.0, 1),
+        (2024, True),
+        (2024, None),
+    ])
+    def test_month_start_rejects_non_int(self, year, month):
+        """Test that anything but ints is refused before it reaches SQL."""
+        with pytest.raises(TypeError):
+            crud._month_start(year, month)
+
+    @pytest.mark.parametrize("month", [0, 13])
+    def test_month_start_rejects_bad_month(self, month):
+        """Test that months outside 1..12 raise."""
+        with pytest.raises(ValueError):
+            crud._month_start(2024, month)
+
+    def test_next_month(self):
+        """Test stepping to the next month, including December to January."""
+        assert crud._next_month(date(2024, 1, 1)) == date(2024, 2, 1)
+        assert crud._next_month(date(2024, 11, 1)) == date(2024, 12, 1)
+        assert crud._next_month(date(2024, 12, 1)) == date(2025, 1, 1)
+
+    def test_partition_name(self):
+        """Test that partitions are named table_YYYY_MM, zero-padded."""
+        december = crud._month_start(2024, 12)
+        assert crud._partition_name("simulation_snapshots", december) == "simulation_snapshots_2024_12"
+        assert (
+            crud._partition_name("simulation_snapshots", crud._next_month(december))
+            == "simulation_snapshots_2025_01"
+        )
+
+    def test_ensure_uses_database_month(self, monkeypatch):
+        """Test that the database's month is partitioned and then not re-checked until it ends."""
+        monkeypatch.setattr(crud, "_partitioned_months", set())
+        monkeypatch.setattr(crud, "_partitions_checked_until", 0.0)
+        created = []
+
+        async def fake_create(db, year, month):
+            created.append((year, month))
+            crud._partitioned_months.add(date(year, month, 1))
+
+        monkeypatch.setattr(crud, "create_snapshot_partition", fake_create)
+
+        class MonthSession:
+            queries = 0
+
+            async def execute(self, stmt):
+                self.queries += 1
+                row = SimpleNamespace(month=date(2024, 12, 1), seconds_left=3600.0)
+                return SimpleNamespace(one=lambda: row)
+
+        db = MonthSession()
+        asyncio.run(crud.ensure_snapshot_partitions(db))
+        asyncio.run(crud.ensure_snapshot_partitions(db))
+
+        assert created == [(2024, 12), (2025, 1)]
+        assert db.queries == 1
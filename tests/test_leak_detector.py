@@ -23,10 +23,12 @@ from leak_detector import (
     LeakDetector,
     LeakDetectionResult,
     AnomalyScore,
-    detect_leaks
+    NetworkIndex,
+    detect_leaks,
+    _multi_source_bfs
 )
-from city_gen import CityNetworkGenerator
-from physics import PhysicsEngine, LeakSimulator
+from city_gen import CityNetworkGenerator, GasNode
+from physics import PhysicsEngine, LeakSimulator, SimulationState
 
 
 class TestLeakDetectorInitialization:
@@ -91,6 +93,72 @@ class TestLeakDetectionResult:
         assert "Check node 1" in result.recommendations
 
 
+class TestNetworkIndex:
+    """Tests for the cached network index."""
+    
+    def test_index_matches_graph(self):
+        """Test rows, neighbors and source mask mirror the graph."""
+        generator = CityNetworkGenerator(seed=42)
+        nodes, pipes, G = generator.generate_network(n_nodes=50)
+        idx = NetworkIndex.build(G, nodes)
+        
+        assert idx.node_ids.tolist() == [n.id for n in nodes]
+        for row, node in enumerate(nodes):
+            neighbors = idx.node_ids[idx.indices[idx.indptr[row]:idx.indptr[row + 1]]]
+            assert set(neighbors.tolist()) == set(G.neighbors(node.id))
+            assert idx.source_mask[row] == (node.node_type == "source")
+            assert idx.id_to_row[node.id] == row
+    
+    def test_index_cached_per_node_list(self):
+        """Test the index is reused for the same node list and rebuilt otherwise."""
+        generator = CityNetworkGenerator(seed=42)
+        nodes, pipes, G = generator.generate_network(n_nodes=30)
+        
+        idx = NetworkIndex.of(G, nodes)
+        assert NetworkIndex.of(G, nodes) is idx
+        assert NetworkIndex.of(G, list(nodes)) is not idx
+    
+    def test_multi_source_bfs_matches_networkx(self):
+        """Test hop counts match NetworkX, with -1 for unreachable rows."""
+        generator = CityNetworkGenerator(seed=42)
+        nodes, pipes, G = generator.generate_network(n_nodes=60)
+        island = GasNode(
+            id=10_000, node_type="residential", x=0.0, y=0.0,
+            base_demand=1.0, elevation=0.0, name="Island"
+        )
+        G.add_node(island.id)  # isolated, never reached
+        idx = NetworkIndex.build(G, list(nodes) + [island])
+        
+        hops = _multi_source_bfs(idx.indptr, idx.indices, np.flatnonzero(idx.source_mask))
+        
+        sources = idx.node_ids[idx.source_mask].tolist()
+        expected = nx.multi_source_dijkstra_path_length(G, sources)
+        assert hops.tolist() == [expected.get(i, -1) for i in idx.node_ids.tolist()]
+
+
+class TestLeakTracing:
+    """Tests for picking the leak node within a cluster."""
+    
+    def test_pressure_tie_goes_to_lowest_node_id(self):
+        """Test equal lowest pressures resolve to the lowest id in any cluster order."""
+        G = nx.path_graph([7, 3, 5, 9])
+        nodes = [
+            GasNode(
+                id=node_id, node_type="residential", x=0.0, y=0.0,
+                base_demand=1.0, elevation=0.0, name=f"Node {node_id}"
+            )
+            for node_id in (7, 3, 5, 9)
+        ]
+        idx = NetworkIndex.build(G, nodes)
+        pressures = np.array([12.0, 30.0, 12.0, 200.0])  # nodes 7 and 5 tie
+        gradients = np.zeros(4)
+        
+        detector = LeakDetector()
+        for cluster in ([7, 3, 5], [5, 3, 7], [3, 5, 7]):
+            leaks = detector._trace_leak_sources(idx, [cluster], pressures, gradients)
+            assert leaks[0]['node_id'] == 5
+
+
 class TestLeakDetectionWithoutLeaks:
     """Tests for leak detection on healthy networks."""
     
@@ -242,6 +310,19 @@ class TestQuickScan:
         # Stricter threshold (0.2) only flags nodes with pressure < 20% of source
         # So loose should find more or equal anomalies
         assert len(result_loose) >= len(result_strict)
+    
+    def test_quick_scan_without_pressure_arrays(self, detector, network_with_state):
+        """Test a state carrying only the pressure dict gives the same result."""
+        nodes, state = network_with_state
+        dict_state = SimulationState(node_pressures=dict(state.node_pressures))
+        
+        expected = [
+            n.id for n in nodes
+            if n.node_type != "source"
+            and state.node_pressures[n.id] < detector.source_pressure * 0.8
+        ]
+        assert detector.quick_scan(state, nodes, threshold_ratio=0.8) == expected
+        assert detector.quick_scan(dict_state, nodes, threshold_ratio=0.8) == expected
 
 
 class TestDetectorWithDifferentNetworkSizes:
@@ -213,7 +213,15 @@ class TestNetworkSimulation:
         assert len(state.node_pressures) == len(nodes)
         for node in nodes:
             assert node.id in state.node_pressures
-    
+
+    def test_pressure_arrays_match_dict(self, engine, network):
+        """Test that the parallel pressure arrays mirror node_pressures."""
+        nodes, pipes, G = network
+        state = engine.simulate_network(G, nodes, pipes)
+
+        assert state.node_ids.tolist() == list(state.node_pressures.keys())
+        assert state.node_pressures_arr.tolist() == list(state.node_pressures.values())
+
     def test_source_pressure(self, engine, network):
         """Test that source nodes maintain high pressure."""
         nodes, pipes, G = network
@@ -414,6 +422,17 @@ class TestPressureStatus:
         status = engine.get_pressure_status(1.0)  # Below 1.7
         assert status == "critical"
 
+    def test_classify_pressures_matches_status(self):
+        """Test vectorized classification agrees with get_pressure_status."""
+        engine = PhysicsEngine(source_pressure=400.0, min_delivery_pressure=1.7)
+        pressures = np.array([350.0, 280.0, 200.0, 160.0, 50.0, 8.5, 5.0, 1.7, 1.0])
+
+        statuses = engine.classify_pressures(pressures)
+
+        assert [engine.PRESSURE_STATUSES[s] for s in statuses] == [
+            engine.get_pressure_status(p) for p in pressures
+        ]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])